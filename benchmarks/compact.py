@@ -0,0 +1,74 @@
+"""
+Memory used per resource instance, with and without compact mode (Meta.compact = True)
+
+Usage: python benchmarks/compact.py [number of instances]
+"""
+import gc
+import sys
+import tracemalloc
+from datetime import datetime
+
+from pyrestcli.fields import CharField, IntegerField, DateTimeField, BooleanField
+from pyrestcli.resources import Resource
+
+
+class Person(Resource):
+    id = IntegerField()
+    name = CharField()
+    email = CharField()
+    age = IntegerField()
+    active = BooleanField()
+    created_at = DateTimeField()
+
+
+class CompactPerson(Resource):
+    id = IntegerField()
+    name = CharField()
+    email = CharField()
+    age = IntegerField()
+    active = BooleanField()
+    created_at = DateTimeField()
+
+    class Meta:
+        compact = True
+
+
+def get_bytes_per_instance(resource_class, raw_resources):
+    """
+    Build one resource per raw resource and measure the memory they take, not counting their field values
+    :param resource_class: Resource class
+    :param raw_resources: List of data dictionaries, as they come from the API
+    :return: Bytes per instance
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    resources = []
+    for raw_resource in raw_resources:
+        resource = resource_class(None)
+        resource.update_from_dict(raw_resource)
+        resources.append(resource)
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Field values are shared with raw_resources, and the list is overhead
+    return float(after - before - sys.getsizeof(resources)) / len(resources)
+
+
+def main(count):
+    created_at = datetime(2016, 9, 11, 14, 57)
+    raw_resources = [{"id": i, "name": "Person {i}".format(i=i), "email": "person{i}@test.com".format(i=i), "age": i % 100,
+                      "active": i % 2 == 0, "created_at": created_at} for i in range(count)]
+
+    regular = get_bytes_per_instance(Person, raw_resources)
+    compact = get_bytes_per_instance(CompactPerson, raw_resources)
+
+    print("instances: {count}".format(count=count))
+    print("regular: {size:.0f} bytes per instance".format(size=regular))
+    print("compact: {size:.0f} bytes per instance".format(size=compact))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,108 @@
+"""
+Time spent decoding each resource of a large collection page, with the decode plan of the class and with a plain setattr loop
+
+Usage: python benchmarks/decode.py [number of rows per page]
+"""
+import sys
+import time
+
+from pyrestcli.auth import NoAuthClient
+from pyrestcli.fields import CharField, IntegerField, DateTimeField, BooleanField, ResourceField
+from pyrestcli.resources import Resource, Manager
+
+
+class PersonField(ResourceField):
+    value_class = "__main__.Person"
+
+
+class Person(Resource):
+    id = IntegerField()
+    name = CharField()
+
+
+class Post(Resource):
+    id = IntegerField()
+    title = CharField()
+    body = CharField()
+    votes = IntegerField()
+    published = BooleanField()
+    created_at = DateTimeField()
+    author = PersonField()
+
+
+class CompactPost(Resource):
+    id = IntegerField()
+    title = CharField()
+    body = CharField()
+    votes = IntegerField()
+    published = BooleanField()
+    created_at = DateTimeField()
+    author = PersonField()
+
+    class Meta:
+        compact = True
+
+
+class PostManager(Manager):
+    resource_class = Post
+    json_collection_attribute = "results"
+
+
+class CompactPostManager(PostManager):
+    resource_class = CompactPost
+
+
+def decode_with_setattr(manager, page):
+    """
+    Decode a page the way it was done before decode plans: every key is looked up in the list of fields and assigned through the
+    field descriptor
+    :param manager: Manager
+    :param page: Page data
+    :return: List of resources
+    """
+    resources = []
+    for raw_resource in page["results"]:
+        resource = manager.resource_class(manager.client)
+        for field_name, field_value in raw_resource.items():
+            if field_name in resource.fields:
+                setattr(resource, field_name, field_value)
+        resource._dirty_fields = None
+        resources.append(resource)
+    return resources
+
+
+def decode_with_plan(manager, page):
+    return list(manager.get_page_resources(page))
+
+
+def get_microseconds_per_resource(decode, manager, page, repeat=3):
+    """
+    :return: Best time out of several runs, in microseconds per resource
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(manager, page)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6 / len(page["results"])
+
+
+def main(count):
+    # A few hundred distinct timestamps and authors, as in real collections
+    page = {"count": count, "next": None, "results": [
+        {"id": i, "title": "Post {i}".format(i=i), "body": "Lorem ipsum " * 5, "votes": i % 50, "published": i % 3 != 0,
+         "created_at": "2016-09-{day:02d}T{hour:02d}:00:00Z".format(day=i % 28 + 1, hour=i % 24), "author": i % 300, "ignored": i}
+        for i in range(count)]}
+    auth_client = NoAuthClient("http://localhost/")
+
+    print("rows per page: {count}".format(count=count))
+    for manager in (PostManager(auth_client), CompactPostManager(auth_client)):
+        setattr_cost = get_microseconds_per_resource(decode_with_setattr, manager, page)
+        plan_cost = get_microseconds_per_resource(decode_with_plan, manager, page)
+        print("{name}: setattr loop {setattr_cost:.2f} us, decode plan {plan_cost:.2f} us per resource".format(
+            name=manager.resource_class.__name__, setattr_cost=setattr_cost, plan_cost=plan_cost))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
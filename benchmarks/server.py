@@ -0,0 +1,205 @@
+"""
+Stub REST server for the benchmarks. It serves synthetic question and choice collections shaped like the ones of the test server
+(tests/restserver), with Django REST Framework's page number pagination
+
+Data is computed out of the ids, so collections of any size take no memory, and updates are echoed back without being stored.
+The server is a WSGI application (StubApp), so it can also be called in the same process, with no sockets involved.
+
+Usage: python benchmarks/server.py [--port 0] [--questions 1000] [--choices-per-question 4] [--page-size 100] [--latency 0]
+
+The first line written to stdout is the URL the server listens on
+"""
+import argparse
+import io
+import json
+import re
+import socket
+import sys
+import time
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+EPOCH = datetime(2016, 9, 11, 14, 57)
+
+
+def get_question(question_id, choices_per_question):
+    return {
+        "id": question_id,
+        "question_text": "Question number {id}?".format(id=question_id),
+        "pub_date": (EPOCH + timedelta(minutes=question_id)).isoformat() + "Z",
+        "choices": list(range((question_id - 1) * choices_per_question + 1, question_id * choices_per_question + 1)),
+    }
+
+
+def get_choice(choice_id, choices_per_question):
+    question_id = (choice_id - 1) // choices_per_question + 1
+    return {
+        "id": choice_id,
+        "question": get_question(question_id, choices_per_question),  # Nested, so that decoding it can be measured
+        "choice_text": "Choice number {id}".format(id=choice_id),
+        "votes": choice_id % 100,
+    }
+
+
+class StubApp(object):
+    """
+    WSGI application serving the collections. It can be called in the same process (see pyrestcli.transports) or through StubServer
+    """
+    route = re.compile(r"^/(questions|choices)/(?:(\d+)/)?$")
+
+    def __init__(self, questions=1000, choices_per_question=4, page_size=100, latency=0.0):
+        """
+        :param questions: Number of questions in the collection
+        :param choices_per_question: Number of choices of every question
+        :param page_size: Default number of items per page
+        :param latency: Time to wait before answering every request, in seconds
+        """
+        self.questions = questions
+        self.choices_per_question = choices_per_question
+        self.page_size = page_size
+        self.latency = latency
+
+    def __call__(self, environ, start_response):
+        status, data = self.handle_request(environ)
+        body = json.dumps(data).encode("utf-8") if data is not None else b""
+        start_response(status, [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    def get_count(self, collection):
+        return self.questions * (self.choices_per_question if collection == "choices" else 1)
+
+    def get_item(self, collection, item_id):
+        if collection == "questions":
+            return get_question(item_id, self.choices_per_question)
+        return get_choice(item_id, self.choices_per_question)
+
+    def handle_request(self, environ):
+        """
+        :param environ: WSGI environ
+        :return: Tuple with the status line and the data to be sent back (or None)
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        http_method = environ["REQUEST_METHOD"]
+        match = self.route.match(environ["PATH_INFO"])
+        if match is None:
+            return "404 Not Found", {"detail": "Not found."}
+        collection, item_id = match.group(1), match.group(2)
+        count = self.get_count(collection)
+
+        if item_id is None:
+            if http_method == "POST":
+                data = self.read_body(environ)
+                data["id"] = count + 1
+                return "201 Created", data
+            params = parse_qs(environ.get("QUERY_STRING", ""))
+            page_size = int(params.get("page_size", [self.page_size])[0])
+            page = int(params.get("page", [1])[0])
+            first_id = (page - 1) * page_size + 1
+            if first_id > count and page != 1:
+                return "404 Not Found", {"detail": "Invalid page."}
+            last_id = min(first_id + page_size - 1, count)
+            next_url = None
+            if last_id < count:
+                next_url = "{scheme}://{host}/{collection}/?page={page}".format(scheme=environ["wsgi.url_scheme"], host=environ["HTTP_HOST"],
+                                                                            collection=collection, page=page + 1)
+            return "200 OK", {"count": count, "next": next_url, "previous": None,
+                              "results": [self.get_item(collection, i) for i in range(first_id, last_id + 1)]}
+
+        item_id = int(item_id)
+        if not 0 < item_id <= count:
+            return "404 Not Found", {"detail": "Not found."}
+        if http_method == "GET":
+            return "200 OK", self.get_item(collection, item_id)
+        if http_method in ("PUT", "PATCH"):
+            data = self.get_item(collection, item_id)
+            data.update(self.read_body(environ))
+            return "200 OK", data
+        if http_method == "DELETE":
+            return "204 No Content", None
+        return "405 Method Not Allowed", {"detail": "Method not allowed."}
+
+    @staticmethod
+    def read_body(environ):
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        return json.loads(environ["wsgi.input"].read(length)) if length else {}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Minimal WSGI gateway for StubApp. Unlike wsgiref's, it keeps connections alive, as real API servers do
+    """
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        # Headers and body are written separately, so Nagle's algorithm would delay every response until the client's ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle_request(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        environ = {
+            "REQUEST_METHOD": self.command,
+            "PATH_INFO": url.path,
+            "QUERY_STRING": url.query,
+            "CONTENT_LENGTH": str(length),
+            "HTTP_HOST": self.headers["Host"],
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(self.rfile.read(length)),
+        }
+
+        def start_response(status, headers):
+            code, reason = status.split(" ", 1)
+            self.send_response(int(code), reason)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+
+        for chunk in self.server.app(environ, start_response):
+            self.wfile.write(chunk)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, app, port=0):
+        """
+        :param app: StubApp to serve
+        :param port: Port to listen on. If 0, any free port will be used
+        """
+        ThreadingHTTPServer.__init__(self, ("127.0.0.1", port), StubHandler)
+        self.app = app
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{port}/".format(port=self.server_address[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub REST server for the benchmarks")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--choices-per-question", type=int, default=4)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering every request")
+    args = parser.parse_args()
+
+    server = StubServer(StubApp(args.questions, args.choices_per_question, args.page_size, args.latency), args.port)
+    print(server.url)
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Benchmark suite. A stub REST server (benchmarks/server.py) is started on a subprocess, and the main operations of pyrestcli are
+measured against it: getting resources, walking collections page by page, saving resources, decoding nested resources and parsing
+datetimes. Every benchmark reports its throughput, latency percentiles (for benchmarks made of separate requests) and peak memory.
+
+Results are written as JSON, so that they can be stored and compared with the ones of other versions:
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --compare before.json
+
+With --compare, the exit code is 1 if any benchmark got slower than the threshold. With --in-process, the stub server is called in the
+same process through a WSGI transport, so that the overhead of the client itself can be told apart from the network's
+
+Benchmarks only use the public API that released versions already had, so that they can be run against any of them. The ones that
+need newer features (concurrent pagination, in-process transports) are skipped when those are not available
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from pyrestcli.auth import NoAuthClient
+from pyrestcli.fields import CharField, IntegerField, DateTimeField, ResourceField
+from pyrestcli.paginators import NextWithUrlPaginator
+from pyrestcli.resources import Resource, Manager
+try:
+    from pyrestcli.paginators import PageNumberPaginator
+except ImportError:
+    PageNumberPaginator = None
+
+from server import StubApp
+
+
+class ChoiceField(ResourceField):
+    value_class = __name__ + ".Choice"
+
+
+class Question(Resource):
+    id = IntegerField()
+    question_text = CharField()
+    pub_date = DateTimeField()
+    choices = ChoiceField(many=True)
+
+    class Meta:
+        name_field = "question_text"
+
+
+class QuestionField(ResourceField):
+    value_class = Question
+
+
+class Choice(Resource):
+    id = IntegerField()
+    question = QuestionField()
+    choice_text = CharField()
+    votes = IntegerField()
+
+    class Meta:
+        name_field = "choice_text"
+
+
+class QuestionManager(Manager):
+    resource_class = Question
+    json_collection_attribute = "results"
+    paginator_class = NextWithUrlPaginator
+
+
+class ChoiceManager(Manager):
+    resource_class = Choice
+    json_collection_attribute = "results"
+    paginator_class = NextWithUrlPaginator
+
+
+def get_percentiles(latencies):
+    """
+    :param latencies: List of latencies, in seconds
+    :return: Dictionary with the median, 90th and 99th percentiles and the maximum, in milliseconds
+    """
+    latencies = sorted(latencies)
+
+    def get_percentile(percentile):
+        return latencies[min(len(latencies) - 1, int(round(percentile / 100.0 * (len(latencies) - 1))))] * 1000
+
+    return {"p50": get_percentile(50), "p90": get_percentile(90), "p99": get_percentile(99), "max": latencies[-1] * 1000}
+
+
+def timed(operation, *args):
+    start = time.perf_counter()
+    operation(*args)
+    return time.perf_counter() - start
+
+
+def run_benchmark(benchmark, trace_memory):
+    """
+    Run a benchmark once to measure its time, and then once more to measure its memory, since tracing memory slows everything down
+    :param benchmark: Callable that does the work and returns the number of operations done and their latencies (or None)
+    :param trace_memory: If True, peak memory will be measured
+    :return: Dictionary with the results
+    """
+    gc.collect()
+    start = time.perf_counter()
+    operations, latencies = benchmark()
+    seconds = time.perf_counter() - start
+
+    result = {"operations": operations, "seconds": seconds, "throughput": operations / seconds}
+    if latencies:
+        result["latency_ms"] = get_percentiles(latencies)
+
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        benchmark()
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def get_benchmarks(auth_client, args):
+    """
+    :param auth_client: Client connected to the stub server
+    :param args: Command line arguments
+    :return: List of (name, benchmark) tuples
+    """
+    question_manager = QuestionManager(auth_client)
+    question_ids = [random.randint(1, args.questions) for _ in range(args.requests)]
+
+    def get():
+        return len(question_ids), [timed(question_manager.get, question_id) for question_id in question_ids]
+
+    def filter_all():
+        return len(question_manager.all()), None
+
+    def filter_all_parallel():
+        class ParallelQuestionManager(QuestionManager):
+            paginator_class = PageNumberPaginator
+
+        return len(ParallelQuestionManager(auth_client).all()), None
+
+    def save():
+        questions = [question_manager.get(question_id) for question_id in question_ids[:args.requests // 4 or 1]]
+        latencies = []
+        for question in questions:
+            question.question_text = "Updated question number {id}?".format(id=question.id)
+            latencies.append(timed(question.save))
+        return len(questions), latencies
+
+    choice_manager = ChoiceManager(auth_client)
+    choice_page = auth_client.get_response_data(auth_client.send(choice_manager.get_collection_endpoint(), "get",
+                                                                 params={"page_size": args.questions}))
+
+    def nested_decoding():
+        choices = []
+        for choice_data in choice_page["results"]:
+            choice = Choice(auth_client)
+            choice.update_from_dict(choice_data)
+            choices.append(choice)
+        return len(choices), None
+
+    # Dates that no other benchmark has seen, so that none of them has been parsed before
+    distinct_dates = [(datetime(2001, 1, 1) + timedelta(seconds=i)).isoformat() + "Z" for i in range(len(choice_page["results"]))]
+    repeated_dates = [distinct_dates[i % 100] for i in range(len(distinct_dates))]
+
+    def parse_dates(dates):
+        question = Question(auth_client)
+        for value in dates:
+            question.pub_date = value
+        return len(dates), None
+
+    def datetime_parsing():
+        return parse_dates(distinct_dates)
+
+    def datetime_parsing_cached():
+        return parse_dates(repeated_dates)
+
+    benchmarks = [("get", get), ("filter_all", filter_all), ("filter_all_parallel", filter_all_parallel), ("save", save),
+                  ("nested_decoding", nested_decoding), ("datetime_parsing", datetime_parsing),
+                  ("datetime_parsing_cached", datetime_parsing_cached)]
+    if PageNumberPaginator is None:
+        benchmarks.remove(("filter_all_parallel", filter_all_parallel))
+    return benchmarks
+
+
+def start_server(args):
+    """
+    Start the stub server on a subprocess
+    :param args: Command line arguments
+    :return: Tuple with the subprocess and the URL of the server
+    """
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+                               "--questions", str(args.questions), "--page-size", str(args.page_size), "--latency", str(args.latency)],
+                              stdout=subprocess.PIPE, universal_newlines=True)
+    return server, server.stdout.readline().strip()
+
+
+def get_version():
+    try:
+        from importlib.metadata import version
+        return version("pyrestcli")
+    except Exception:
+        return None
+
+
+def compare(results, previous_results, threshold):
+    """
+    Print the change in throughput of every benchmark against previous results
+    :param results: Results
+    :param previous_results: Previous results, as written by this script
+    :param threshold: Maximum acceptable loss of throughput, as a fraction
+    :return: True if no benchmark got slower than the threshold
+    """
+    ok = True
+    for name, result in sorted(results["benchmarks"].items()):
+        previous_result = previous_results["benchmarks"].get(name)
+        if previous_result is None:
+            continue
+        change = result["throughput"] / previous_result["throughput"] - 1
+        regression = change < -threshold
+        ok = ok and not regression
+        sys.stderr.write("{name}: {change:+.1%}{regression}\n".format(name=name, change=change, regression=" REGRESSION" if regression else ""))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pyrestcli benchmark suite")
+    parser.add_argument("--questions", type=int, default=2000, help="Number of questions served by the stub server")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stub server waits before answering every request")
+    parser.add_argument("--requests", type=int, default=200, help="Number of requests for the benchmarks made of separate requests")
+    parser.add_argument("--in-process", action="store_true", help="Call the stub server in the same process, with no sockets")
+    parser.add_argument("--only", nargs="*", help="Names of the benchmarks to be run")
+    parser.add_argument("--no-memory", action="store_true", help="Do not measure peak memory")
+    parser.add_argument("--output", help="File to write the results to, instead of stdout")
+    parser.add_argument("--compare", help="File with previous results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Maximum acceptable loss of throughput when comparing")
+    args = parser.parse_args()
+
+    random.seed(0)
+    if args.in_process:
+        server, url = None, "http://stub/"
+        app = StubApp(args.questions, page_size=args.page_size, latency=args.latency)
+    else:
+        server, url = start_server(args)
+        app = None
+    try:
+        auth_client = NoAuthClient(url, app=app) if app is not None else NoAuthClient(url)
+        results = {
+            "version": get_version(),
+            "python": platform.python_version(),
+            "date": datetime.utcnow().isoformat(),
+            "config": {"questions": args.questions, "page_size": args.page_size, "latency": args.latency, "requests": args.requests,
+                       "in_process": args.in_process},
+            "benchmarks": {},
+        }
+        for name, benchmark in get_benchmarks(auth_client, args):
+            if not args.only or name in args.only:
+                results["benchmarks"][name] = run_benchmark(benchmark, not args.no_memory)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as previous_file:
+            if not compare(results, json.load(previous_file), args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,60 @@
+import time
 import warnings
 import requests
-from gettext import gettext as _
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 try:
-    from urllib.parse import urljoin
+    import httpx
 except ImportError:
-    from urlparse import urljoin
+    httpx = None
+from gettext import gettext as _
+from urllib.parse import urljoin, urlsplit
 
+from .coalescing import RequestCoalescer
 from .exceptions import BaseException
+from .identity import IdentityMap
+from .jsoncodec import get_default_codec
+from .metrics import MetricsCollector
+from .streaming import StreamingDocument
+from .retry import RetryPolicy
+from .transports import WSGIAdapter
 
 
 class BaseAuthClient(object):
-    """ Basic client to access (non)authorized REST APIs """
-    def __init__(self, base_url, session=None):
+    """
+    Basic client to access (non)authorized REST APIs
+
+    One client can be shared by many threads: once initialized, the client never changes the state of its session, and requests
+    are sent through the session's connection pool, which is thread-safe. Just do not change the session (headers, auth...) while
+    other threads are using it
+    """
+    body_argument = "data"  # Argument of the session's request method that takes the raw request body
+    stream_chunk_size = 64 * 1024  # Size of the chunks read from responses parsed while they are downloaded
+
+    def __init__(self, base_url, session=None, identity_map=False, cache=None, retry_policy=None, rate_limiter=None,
+                 pool_connections=None, pool_maxsize=None, pool_block=None, codec=None, metrics=None, app=None,
+                 coalesce=None):
         """
         :param base_url: Base URL. API endpoint paths will always be relative to this URL
         :param session: requests' session
+        :param pool_connections: Number of hosts whose connection pools are kept (requests' default is 10)
+        :param pool_maxsize: Maximum number of keep-alive connections kept per host (requests' default is 10). Set it to at least the
+                             number of threads sharing the client, or connections will be discarded after use
+        :param pool_block: If True, no more than pool_maxsize connections will be opened per host; requests will wait for a free
+                           connection instead (requests' default is False)
+        :param identity_map: If True, or an IdentityMap instance, resources retrieved through this client will be materialized only
+                             once per remote object, and shared by every manager and resource field that gets them
+        :param cache: HTTP cache (see pyrestcli.cache) to store GET responses and revalidate them with conditional requests
+        :param retry_policy: If True, or a RetryPolicy instance, failed requests will be retried according to that policy
+        :param rate_limiter: RateLimiter instance (see pyrestcli.ratelimit) that every request, retries included, must go through
+        :param codec: JSONCodec instance (see pyrestcli.jsoncodec) to decode response bodies and encode request bodies. Defaults to the
+                      standard library's decoder and encoder (see get_default_codec)
+        :param metrics: If True, or a MetricsCollector instance (see pyrestcli.metrics), metrics of every request sent through this
+                        client will be collected
+        :param app: WSGI application (see pyrestcli.transports) to send the requests to the API host to, in the same process, instead
+                    of sending them over the network
+        :param coalesce: If True, or a RequestCoalescer instance (see pyrestcli.coalescing), concurrent identical GET requests will be
+                         sent only once, and all of them will get the same response
         :return:
         """
         self.base_url = base_url
@@ -22,6 +62,29 @@ class BaseAuthClient(object):
             self.session = requests.Session()
         else:
             self.session = session
+        self.identity_map = IdentityMap() if identity_map is True else identity_map or None
+        self.cache = cache
+        self.retry_policy = RetryPolicy() if retry_policy is True else retry_policy or None
+        self.rate_limiter = rate_limiter
+        self.codec = codec if codec is not None else get_default_codec()
+        self.coalescer = RequestCoalescer() if coalesce is True else coalesce or None
+
+        self.before_send_hooks = []
+        self.after_response_hooks = []
+        self.metrics = MetricsCollector() if metrics is True else metrics or None
+        if self.metrics is not None:
+            self.add_hook("after_response", self.metrics.after_response)
+
+        self.pool_maxsize = pool_maxsize
+        if isinstance(self.session, requests.Session) and (pool_connections, pool_maxsize, pool_block) != (None, None, None):
+            adapter_args = {"pool_connections": pool_connections, "pool_maxsize": pool_maxsize, "pool_block": pool_block}
+            adapter = HTTPAdapter(**dict((name, value) for name, value in adapter_args.items() if value is not None))
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+
+        if app is not None and isinstance(self.session, requests.Session):
+            url = urlsplit(base_url)
+            self.session.mount("{scheme}://{host}/".format(scheme=url.scheme, host=url.netloc), WSGIAdapter(app))
 
     def send(self, relative_path, http_method, **requests_args):
         """
@@ -32,8 +95,166 @@ class BaseAuthClient(object):
         :return:
         """
         url = urljoin(self.base_url, relative_path)
+        self.encode_json_body(requests_args)
+
+        if self.coalescer is not None:
+            return self.coalescer.send(self.dispatch, http_method, url, **requests_args)
+        return self.dispatch(http_method, url, **requests_args)
+
+    def dispatch(self, http_method, url, **requests_args):
+        """
+        Send a request through the cache, if any
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to requests
+        :return: requests' response object
+        """
+        if self.cache is not None:
+            return self.cache.send(self.request, http_method, url, **requests_args)
+        return self.request(http_method, url, **requests_args)
+
+    def add_hook(self, event, hook):
+        """
+        Add a function to be called on every attempt to send a request, retries included
+        :param event: "before_send" hooks get the HTTP method, the URL and the kargs to be sent to requests, which they can change.
+                      "after_response" hooks get the HTTP method, the URL, the kargs sent to requests, the response (None if the request
+                      failed), the time taken by the request in seconds and the exception raised by the request, if any
+        :param hook: Function
+        :return:
+        """
+        if event == "before_send":
+            self.before_send_hooks.append(hook)
+        elif event == "after_response":
+            self.after_response_hooks.append(hook)
+        else:
+            raise ValueError(_("Unknown hook event: {event}").format(event=event))
+
+    def run_before_send_hooks(self, http_method, url, requests_args):
+        for hook in self.before_send_hooks:
+            hook(http_method, url, requests_args)
+
+    def run_after_response_hooks(self, http_method, url, requests_args, response, elapsed, error=None):
+        for hook in self.after_response_hooks:
+            hook(http_method, url, requests_args, response, elapsed, error)
+
+    def encode_json_body(self, requests_args):
+        """
+        Encode the json argument of a request with the client codec, instead of leaving it to requests
+        :param requests_args: kargs to be sent to requests. They are updated in place
+        :return:
+        """
+        json_body = requests_args.pop("json", None)
+        if json_body is not None:
+            headers = dict(requests_args.get("headers") or {})
+            if not any(header.lower() == "content-type" for header in headers):
+                headers["Content-Type"] = "application/json"
+            requests_args["headers"] = headers
+            requests_args[self.body_argument] = self.codec.encode(json_body)
+
+    def request(self, http_method, url, **requests_args):
+        """
+        Send a request through the session
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to requests
+        :return: requests' response object
+        """
+        if self.retry_policy is not None:
+            return self.retry_policy.send(self.request_once, http_method, url, **requests_args)
+        return self.request_once(http_method, url, **requests_args)
+
+    def request_once(self, http_method, url, **requests_args):
+        """
+        Make one single attempt to send a request through the session, waiting for the rate limiter if needed
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to requests
+        :return: requests' response object
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(http_method, url)
+        if not (self.before_send_hooks or self.after_response_hooks):
+            return self.session.request(http_method, url, **requests_args)
+
+        self.run_before_send_hooks(http_method, url, requests_args)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(http_method, url, **requests_args)
+        except Exception as e:
+            self.run_after_response_hooks(http_method, url, requests_args, None, time.perf_counter() - start, e)
+            raise
+        self.run_after_response_hooks(http_method, url, requests_args, response, time.perf_counter() - start)
+        return response
+
+    def warm_up(self, connections=1):
+        """
+        Open keep-alive connections to the API host in advance, so that the first requests do not have to wait for the connection
+        (and TLS) handshakes
+        :param connections: Number of connections to open. It will be capped to pool_maxsize
+        :return: Number of connections actually opened
+        """
+        if self.pool_maxsize is not None:
+            connections = min(connections, self.pool_maxsize)
+        # Use the very same pool requests will use for the API host, TLS settings included. Those are merged with the environment ones
+        # (REQUESTS_CA_BUNDLE, proxies...), as requests does, since they are part of the key of the pool
+        adapter = self.session.get_adapter(self.base_url)
+        if not isinstance(adapter, HTTPAdapter):
+            return 0  # Nothing to connect to, if the API is served in the same process
+        settings = self.session.merge_environment_settings(self.base_url, {}, None, None, None)
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            request = requests.Request("HEAD", self.base_url).prepare()
+            pool = adapter.get_connection_with_tls_context(request, settings["verify"], settings["proxies"], settings["cert"])
+        else:
+            pool = adapter.get_connection(self.base_url, settings["proxies"])
+
+        def open_connection(_):
+            return pool.urlopen("HEAD", self.base_url, preload_content=False, release_conn=False, retries=False, redirect=False)
+
+        responses = []
+        with ThreadPoolExecutor(max_workers=max(connections, 1)) as executor:
+            futures = [executor.submit(open_connection, i) for i in range(connections)]
+            for future in futures:
+                try:
+                    responses.append(future.result())
+                except Exception:
+                    pass
+
+        # Connections are only given back to the pool once all of them are open, so that none of them is reused during warm-up
+        for response in responses:
+            response.drain_conn()
+            response.release_conn()
+
+        return len(responses)
+
+    def get_response_json(self, response):
+        """
+        Decode the JSON body of a response with the client codec. The result is kept, so that the body is decoded only once no matter
+        how many times (paginator, manager...) it is asked for
+        :param response: requests response object
+        :return: Decoded data
+        """
+        cache_entry = getattr(response, "cache_entry", None)
+        if cache_entry is not None:
+            if cache_entry.data is None:
+                cache_entry.data = self.codec.decode(response.content)
+            return cache_entry.data
+
+        try:
+            return response.decoded_json
+        except AttributeError:
+            response.decoded_json = self.codec.decode(response.content)
+            return response.decoded_json
 
-        return self.session.request(http_method, url, **requests_args)
+    def stream_response_json(self, response, collection_attribute):
+        """
+        Parse the JSON body of a response requested with stream=True while it is downloaded (see pyrestcli.streaming). The streaming
+        document is then given by get_response_json, as if the body had been decoded
+        :param response: requests response object
+        :param collection_attribute: Name of the member of the body with the array to be streamed
+        :return:
+        """
+        if response.status_code < 400 and response.status_code != requests.codes.no_content:
+            response.decoded_json = StreamingDocument(response.iter_content(self.stream_chunk_size), collection_attribute, response.close)
 
     def get_response_data(self, response, parse_json=True):
         """
@@ -45,10 +266,14 @@ class BaseAuthClient(object):
         if response.status_code < 400:
             if response.status_code != requests.codes.no_content:
                 if parse_json:
-                    return response.json()
+                    return self.get_response_json(response)
                 return response.content
         else:
-            raise BaseException.create(response)
+            try:
+                response_json = self.get_response_json(response)
+            except ValueError:
+                response_json = None
+            raise BaseException.create(response, response_json)
 
 
 class NoAuthClient(BaseAuthClient):
@@ -87,11 +312,11 @@ class TokenAuthClient(BaseAuthClient):
         else:
             header_keyword = "Token"
 
+        super(TokenAuthClient, self).__init__(*args, **kwargs)
+
         if not self.base_url.startswith('https'):
             warnings.warn(_("You are using unencrypted token authentication!!!"))
 
-        super(TokenAuthClient, self).__init__(*args, **kwargs)
-
         self.session.headers.update({"authentication": "{keyword} {token}".format(keyword=header_keyword, token=token)})
 
 
@@ -108,3 +333,127 @@ class BasicAuthClient(BaseAuthClient):
         super(BasicAuthClient, self).__init__(*args, **kwargs)
 
         self.session.auth = (user_name, password)
+
+
+class AsyncAuthClient(BaseAuthClient):
+    """
+    Basic client to access (non)authorized REST APIs from asyncio code
+
+    Requests are sent through an httpx.AsyncClient, whose connection pool is shared by all the coroutines using this client
+    """
+    body_argument = "content"
+
+    def __init__(self, base_url, session=None, **kwargs):
+        """
+        :param base_url: Base URL. API endpoint paths will always be relative to this URL
+        :param session: httpx's AsyncClient
+        :param kwargs: Other options, as in BaseAuthClient, except cache. pool_maxsize sets the maximum number of connections of the pool.
+                       app takes an ASGI application instead of a WSGI one
+        :return:
+        """
+        if kwargs.get("cache") is not None:
+            raise ValueError(_("HTTP caches are not supported by asynchronous clients"))
+        if session is None:
+            if httpx is None:
+                raise ImportError(_("httpx is required to use asynchronous clients"))
+            pool_maxsize = kwargs.get("pool_maxsize")
+            if kwargs.get("app") is not None:
+                session = httpx.AsyncClient(transport=httpx.ASGITransport(app=kwargs["app"]))
+            elif pool_maxsize is not None:
+                session = httpx.AsyncClient(limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize))
+            else:
+                session = httpx.AsyncClient()
+
+        super(AsyncAuthClient, self).__init__(base_url, session=session, **kwargs)
+
+    async def send(self, relative_path, http_method, **requests_args):
+        """
+        Send an API request without blocking the event loop
+        :param relative_path: URL path relative to self.base_url
+        :param http_method: HTTP method
+        :param requests_args: kargs to be sent to httpx
+        :return: httpx's response object
+        """
+        url = urljoin(self.base_url, relative_path)
+        self.encode_json_body(requests_args)
+
+        params = requests_args.get("params")
+        if params is not None and "?" in url:
+            # Unlike requests, httpx replaces the query string of the URL with params, instead of adding params to it
+            requests_args["params"] = httpx.URL(url).params.merge(params)
+
+        if self.coalescer is not None:
+            return await self.coalescer.asend(self.dispatch, http_method, url, **requests_args)
+        return await self.dispatch(http_method, url, **requests_args)
+
+    async def dispatch(self, http_method, url, **requests_args):
+        """
+        Send a request, retrying it according to the retry policy, if any
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to httpx
+        :return: httpx's response object
+        """
+        if self.retry_policy is not None:
+            return await self.retry_policy.asend(self.request_once, http_method, url, **requests_args)
+        return await self.request_once(http_method, url, **requests_args)
+
+    async def request_once(self, http_method, url, **requests_args):
+        """
+        Make one single attempt to send a request through the session, waiting for the rate limiter if needed
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to httpx
+        :return: httpx's response object
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire(http_method, url)
+        if not (self.before_send_hooks or self.after_response_hooks):
+            return await self.session.request(http_method, url, **requests_args)
+
+        self.run_before_send_hooks(http_method, url, requests_args)
+        start = time.perf_counter()
+        try:
+            response = await self.session.request(http_method, url, **requests_args)
+        except Exception as e:
+            self.run_after_response_hooks(http_method, url, requests_args, None, time.perf_counter() - start, e)
+            raise
+        self.run_after_response_hooks(http_method, url, requests_args, response, time.perf_counter() - start)
+        return response
+
+    async def get_response_data(self, response, parse_json=True):
+        """
+        Get response data or throw an appropiate exception
+        :param response: httpx response object
+        :param parse_json: if True, response will be parsed as JSON
+        :return: response data, either as json or as a regular response.content object
+        """
+        return super(AsyncAuthClient, self).get_response_data(response, parse_json)
+
+    async def close(self):
+        """
+        Close all the connections in the pool
+        :return:
+        """
+        await self.session.aclose()
+
+
+class AsyncNoAuthClient(NoAuthClient, AsyncAuthClient):
+    """
+    This class provides you with simple unauthenticated access to APIs from asyncio code
+    """
+    pass
+
+
+class AsyncTokenAuthClient(TokenAuthClient, AsyncAuthClient):
+    """
+    This class provides you with token-based authenticated access to APIs from asyncio code
+    """
+    pass
+
+
+class AsyncBasicAuthClient(BasicAuthClient, AsyncAuthClient):
+    """
+    This class provides you with basic HTTP authenticated access to APIs from asyncio code
+    """
+    pass
@@ -0,0 +1,288 @@
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_tz, mktime_tz
+import requests
+from urllib.parse import urljoin
+
+
+def get_expiration(headers):
+    """
+    Get the time until which a response can be used without revalidating it, according to its Cache-Control and Expires headers
+    :param headers: Response headers
+    :return: Expiration timestamp, 0 if the response must always be revalidated, or None if it must not be stored at all
+    """
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    if "max-age" in directives:
+        try:
+            return time.time() + int(directives["max-age"])
+        except ValueError:
+            return 0
+    if "Expires" in headers:
+        expires = parsedate_tz(headers["Expires"])
+        return mktime_tz(expires) if expires is not None else 0
+    return 0
+
+
+class CacheEntry(object):
+    """
+    Stored response, with its validators and its freshness information
+
+    The parsed JSON of the body is kept along with the raw body, so that it is decoded only once for all the requests the entry serves
+    """
+    def __init__(self, url, content, headers):
+        """
+        :param url: URL of the request, without query string
+        :param content: Raw response body
+        :param headers: Response headers
+        """
+        self.url = url
+        self.content = content
+        self.headers = dict(headers)
+        self.expires = get_expiration(headers) or 0
+        self.data = None
+
+    @property
+    def size(self):
+        return len(self.content)
+
+    @property
+    def etag(self):
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self):
+        return self.headers.get("Last-Modified")
+
+    def is_fresh(self):
+        return time.time() < self.expires
+
+    def revalidate(self, headers):
+        """
+        Update the entry with the headers of a 304 Not Modified response
+        :param headers: Response headers
+        :return:
+        """
+        self.headers.update(headers)
+        self.expires = get_expiration(headers) or 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["data"] = None
+        return state
+
+
+class CachedResponse(requests.Response):
+    """
+    Response whose body is held by a cache entry
+    """
+    def __init__(self, entry, url, response=None):
+        """
+        :param entry: Cache entry
+        :param url: Full URL of the request
+        :param response: Response the entry has just been built from, if it has not been served from the cache
+        """
+        super(CachedResponse, self).__init__()
+        if response is not None:
+            self.__dict__.update(response.__dict__)
+        else:
+            self.status_code = requests.codes.ok
+            self.reason = "OK"
+            self._content = entry.content
+            self.headers.update(entry.headers)
+            self.url = url
+        self.cache_entry = entry
+        self.from_cache = response is None
+
+    def json(self, **kwargs):
+        if self.cache_entry.data is None:
+            self.cache_entry.data = super(CachedResponse, self).json(**kwargs)
+        return self.cache_entry.data
+
+
+class BaseCache(object):
+    """
+    HTTP cache for auth clients. GET responses with validators (ETag, Last-Modified) or with an expiration time are stored.
+    Fresh entries are served without contacting the server; otherwise they are revalidated with a conditional request. Any
+    other method invalidates the stored responses for its URL and for the collection that URL belongs to.
+
+    Data served from the cache is shared, so it must be treated as read-only.
+
+    Subclasses must implement the storage methods: get, set, invalidate and clear
+    """
+    def send(self, request, http_method, url, **requests_args):
+        """
+        Send a request through the cache
+        :param request: Callable that actually sends requests, with the same signature as requests' session.request
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to requests
+        :return: requests' response object
+        """
+        if http_method.lower() != "get" or requests_args.get("stream"):
+            response = request(http_method, url, **requests_args)
+            if http_method.lower() not in ("get", "head", "options"):
+                url = url.split("?", 1)[0]
+                self.invalidate(url)
+                self.invalidate(urljoin(url, "../"))
+            return response
+
+        key = requests.Request("GET", url, params=requests_args.get("params")).prepare().url
+        entry = self.get(key)
+
+        if entry is not None:
+            if entry.is_fresh():
+                return CachedResponse(entry, key)
+            headers = dict(requests_args.get("headers") or {})
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+            requests_args["headers"] = headers
+
+        response = request(http_method, url, **requests_args)
+
+        if response.status_code == requests.codes.not_modified and entry is not None:
+            entry.revalidate(response.headers)
+            self.set(key, entry)
+            return CachedResponse(entry, key)
+
+        if response.status_code == requests.codes.ok:
+            expires = get_expiration(response.headers)
+            if expires is not None and ("ETag" in response.headers or "Last-Modified" in response.headers or expires > time.time()):
+                entry = CacheEntry(key.split("?", 1)[0], response.content, response.headers)
+                self.set(key, entry)
+                return CachedResponse(entry, key, response)
+
+        return response
+
+    def get(self, key):
+        """
+        :param key: Full URL of the request, including the query string
+        :return: Cache entry, or None if not found
+        """
+        raise NotImplementedError
+
+    def set(self, key, entry):
+        """
+        :param key: Full URL of the request, including the query string
+        :param entry: Cache entry
+        :return:
+        """
+        raise NotImplementedError
+
+    def invalidate(self, url):
+        """
+        Remove all the entries for a URL, no matter their query strings
+        :param url: URL without query string
+        :return:
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(BaseCache):
+    """
+    In-memory LRU cache, limited by the total size of the stored response bodies
+    """
+    def __init__(self, max_size=64 * 1024 * 1024):
+        """
+        :param max_size: Maximum size of the stored response bodies, in bytes
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.entries = OrderedDict()
+        self.keys_by_url = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self.lock:
+            self._remove(key)
+            if entry.size > self.max_size:
+                return
+            self.entries[key] = entry
+            self.keys_by_url.setdefault(entry.url, set()).add(key)
+            self.size += entry.size
+            while self.size > self.max_size:
+                self._remove(next(iter(self.entries)))
+
+    def invalidate(self, url):
+        with self.lock:
+            for key in list(self.keys_by_url.get(url, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_url.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+            keys = self.keys_by_url[entry.url]
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_url[entry.url]
+
+
+class FileCache(BaseCache):
+    """
+    On-disk cache. Entries for the same URL are stored together in one directory, so that they can be invalidated at once
+    """
+    def __init__(self, directory):
+        """
+        :param directory: Directory where the entries will be stored
+        """
+        self.directory = directory
+
+    def get_path(self, url, key=None):
+        path = os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest())
+        return os.path.join(path, hashlib.sha1(key.encode("utf-8")).hexdigest()) if key is not None else path
+
+    def get(self, key):
+        url = key.split("?", 1)[0]
+        try:
+            with open(self.get_path(url, key), "rb") as entry_file:
+                return pickle.load(entry_file)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def set(self, key, entry):
+        path = self.get_path(entry.url, key)
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError:
+            pass
+        temporary_path = "{path}.{pid}.{thread}".format(path=path, pid=os.getpid(), thread=threading.current_thread().ident)
+        with open(temporary_path, "wb") as entry_file:
+            pickle.dump(entry, entry_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    def invalidate(self, url):
+        shutil.rmtree(self.get_path(url), ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
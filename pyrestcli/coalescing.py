@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import requests
+
+
+def copy_response(response):
+    """
+    Shallow copy of a response whose body has already been read, without its decoded JSON, so that the body of every copy is decoded
+    on its own
+    :param response: requests (or httpx) response object
+    :return: Copy of the response
+    """
+    copy = response.__class__.__new__(response.__class__)
+    copy.__dict__.update(response.__dict__)
+    copy.__dict__.pop("decoded_json", None)
+    return copy
+
+
+class InFlightRequest(object):
+    """
+    GET request being sent on behalf of every caller that asked for the same URL while it was in flight
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class RequestCoalescer(object):
+    """
+    Single-flight coalescing of GET requests for auth clients. While a GET request is in flight, identical requests (same URL, query
+    string and headers) wait for its response instead of being sent too. Every caller gets its own copy of the response, so no data
+    older than the request in flight is ever served
+
+    Streamed requests and requests with any other method are always sent
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.sent = 0
+        self.coalesced = 0
+
+    def get_key(self, http_method, url, requests_args):
+        """
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to requests (or httpx)
+        :return: Key that identical requests share, or None if the request must not be coalesced
+        """
+        if http_method.lower() != "get" or requests_args.get("stream"):
+            return None
+        params = requests_args.get("params")
+        if hasattr(params, "multi_items"):  # httpx's QueryParams
+            params = params.multi_items()
+        headers = requests_args.get("headers")
+        return (requests.Request("GET", url, params=params).prepare().url,
+                tuple(sorted((name.lower(), value) for name, value in headers.items())) if headers else ())
+
+    def join(self, key, call):
+        """
+        Register a request, unless an identical one is already in flight
+        :param key: Request key
+        :param call: In-flight request to be registered if there is none for the key
+        :return: Tuple with the in-flight request for the key and whether it is the given one
+        """
+        with self.lock:
+            in_flight = self.in_flight.setdefault(key, call)
+            if in_flight is call:
+                self.sent += 1
+            else:
+                self.coalesced += 1
+        return in_flight, in_flight is call
+
+    def leave(self, key):
+        with self.lock:
+            del self.in_flight[key]
+
+    def send(self, request, http_method, url, **requests_args):
+        """
+        Send a request, or wait for the identical one in flight
+        :param request: Callable that actually sends requests, with the same signature as requests' session.request
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to requests
+        :return: requests' response object
+        """
+        key = self.get_key(http_method, url, requests_args)
+        if key is None:
+            return request(http_method, url, **requests_args)
+
+        call, leader = self.join(key, InFlightRequest())
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            if call.response is None:  # The request in flight was interrupted, so send it again
+                return self.send(request, http_method, url, **requests_args)
+            return copy_response(call.response)
+
+        try:
+            response = request(http_method, url, **requests_args)
+            response.content  # Read the body before sharing the response
+            call.response = copy_response(response)
+            return response
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            self.leave(key)
+            call.done.set()
+
+    async def asend(self, request, http_method, url, **requests_args):
+        """
+        Send a request from asyncio code, or wait for the identical one in flight
+        :param request: Coroutine function that actually sends requests, with the same signature as httpx's client.request
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to httpx
+        :return: httpx's response object
+        """
+        key = self.get_key(http_method, url, requests_args)
+        if key is None:
+            return await request(http_method, url, **requests_args)
+
+        loop = asyncio.get_running_loop()
+        key += (loop,)
+        call, leader = self.join(key, loop.create_future())
+        if not leader:
+            try:
+                return copy_response(await asyncio.shield(call))
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+            # The request in flight was cancelled along with the task that sent it, so send it again
+            return await self.asend(request, http_method, url, **requests_args)
+
+        try:
+            response = await request(http_method, url, **requests_args)
+            call.set_result(copy_response(response))
+            return response
+        except Exception as e:
+            call.set_exception(e)
+            call.exception()  # Nobody may be waiting for it
+            raise
+        except BaseException:
+            call.cancel()
+            raise
+        finally:
+            self.leave(key)
+
+    def get_stats(self):
+        """
+        :return: Dictionary with the number of requests actually sent and the number of requests that waited for them instead
+        """
+        with self.lock:
+            return {"requests": self.sent, "coalesced": self.coalesced}
@@ -21,18 +21,26 @@ class BaseException(Exception):
         self.url = url
 
     @staticmethod
-    def create(response):
-        response_json = {}
-        try:
-            response_json = response.json()
-        except ValueError:
-            pass
-        except json.decoder.JSONDecodeError:
-            pass
+    def create(response, response_json=None):
+        """
+        Raise the exception that corresponds to the status code of an error response
+        :param response: requests (or httpx) response object
+        :param response_json: Response body, if it has already been decoded
+        """
+        if response_json is None:
+            response_json = {}
+            try:
+                response_json = response.json()
+            except ValueError:
+                pass
+            except json.decoder.JSONDecodeError:
+                pass
+        if not isinstance(response_json, dict):
+            response_json = {}
         message = response_json.get("error", response_json.get("errors", response.text))
         headers = response.headers
         status_code = response.status_code
-        reason = response.reason
+        reason = getattr(response, "reason", getattr(response, "reason_phrase", None))  # httpx responses use reason_phrase
         url = response.url
 
         error = ERRORS.get(status_code, 'BaseException')
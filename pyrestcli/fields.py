@@ -1,3 +1,5 @@
+from datetime import datetime
+from functools import lru_cache
 from dateutil.parser import parse
 
 
@@ -10,6 +12,9 @@ class Field(object):
 
     Fields are a very handy way to parse jsons coming from the REST API and store real Python objects on the resource
     """
+    slot = None  # Slot descriptor where the value is stored, for resources in compact mode. Otherwise, values go to the instance dict
+    lazy = False  # If True, values coming from the API are kept raw and converted on first access (see Resource.Meta.lazy)
+
     def __init__(self, many=False):
         """
         Initialize the field
@@ -26,18 +31,101 @@ class Field(object):
         :return: Value stored in instance.name (TODO: maybe change this in the future to instance.Cache.name)
         """
         if instance is not None and self.name is not None:
-            return instance.__dict__.get(self.name)
+            if self.lazy:
+                raw_values = getattr(instance, "_raw_values", None)
+                if raw_values and self.name in raw_values:
+                    return self.decode_raw_value(instance, raw_values)
+            return self.get_value(instance)
         else:
             return self
 
     def __set__(self, instance, value):
         """
-        Normal descriptor set method
+        Normal descriptor set method. The field is marked as changed on the instance, until it is synced with the server
         :param instance: Resource instance where the field lives
         :param value: Value to store in instance.name (TODO: maybe change this in the future to instance.Cache.name)
         """
         if instance is not None and self.name is not None:
+            self.set_value(instance, self.to_python(instance, value))
+            if self.lazy:
+                raw_values = getattr(instance, "_raw_values", None)
+                if raw_values:
+                    raw_values.pop(self.name, None)
+            dirty_fields = getattr(instance, "_dirty_fields", None)
+            if dirty_fields is None:
+                instance._dirty_fields = set([self.name])
+            else:
+                dirty_fields.add(self.name)
+
+    def to_python(self, instance, value):
+        """
+        Convert a value coming from the API (or assigned by the user) into the Python object stored in the instance. This default
+        field stores values as they come
+        :param instance: Resource instance where the field lives
+        :param value: Value
+        :return: Converted value
+        """
+        return value
+
+    def needs_conversion(self):
+        """
+        :return: True if this field converts the values it stores, so that it is worth deferring the conversion in lazy resources
+        """
+        return getattr(type(self).to_python, "__func__", type(self).to_python) is not getattr(Field.to_python, "__func__", Field.to_python)
+
+    def get_decoder(self):
+        """
+        Get the function resources use to store the values of this field that come from the API. Unlike assignments, decoding does
+        not mark the field as changed
+        :return: Callable that takes the instance and the value, or None if values can be stored as they come in the instance dict
+        """
+        if getattr(type(self).__set__, "__func__", type(self).__set__) is not getattr(Field.__set__, "__func__", Field.__set__):
+            return self.__set__  # Fields that still customize __set__ get it called, as they used to
+        if self.needs_conversion():
+            to_python, set_value = self.to_python, self.set_value
+            return lambda instance, value: set_value(instance, to_python(instance, value))
+        if self.slot is not None:
+            return self.slot.__set__
+        return None
+
+    def decode_raw_value(self, instance, raw_values):
+        """
+        Convert the raw value kept for this field and store the result, so that the conversion happens only once. The field is not
+        marked as changed, because it still holds what came from the API
+
+        If several threads access the field at the same time, the conversion may run more than once, but they all get the same value
+        :param instance: Resource instance where the field lives
+        :param raw_values: Dictionary with the raw values of the instance
+        :return: Converted value
+        """
+        value = self.to_python(instance, raw_values[self.name])
+        self.set_value(instance, value)
+        raw_values.pop(self.name, None)
+        return value
+
+    def get_value(self, instance):
+        """
+        Get the value stored in the instance
+        :param instance: Resource instance where the field lives
+        :return: Value, or None if there is none
+        """
+        if self.slot is None:
+            return instance.__dict__.get(self.name)
+        try:
+            return self.slot.__get__(instance)
+        except AttributeError:
+            return None
+
+    def set_value(self, instance, value):
+        """
+        Store a value in the instance, as is
+        :param instance: Resource instance where the field lives
+        :param value: Value
+        """
+        if self.slot is None:
             instance.__dict__[self.name] = value
+        else:
+            self.slot.__set__(instance, value)
 
 
 class BooleanField(Field):
@@ -71,25 +159,56 @@ class CharField(Field):
 class DateTimeField(Field):
     """
     Field to store datetimes in resources
+
+    ISO-8601 strings are parsed with datetime.fromisoformat, and anything else with dateutil. Parsed datetimes are cached, because the
+    same timestamps tend to show up many times in a collection
     """
-    def __set__(self, instance, value):
+    def __init__(self, many=False, datetime_format=None, cache_size=1024):
+        """
+        Initialize the field
+        :param many: Set to True if this field will host a list of items
+        :param datetime_format: If set, strings will be parsed with datetime.strptime and this format, instead of guessing it
+        :param cache_size: Maximum number of parsed strings kept in the cache. Use 0 to disable the cache
+        """
+        self.datetime_format = datetime_format
+        if cache_size:
+            self.parse_datetime = lru_cache(maxsize=cache_size)(self.parse_datetime)
+        super(DateTimeField, self).__init__(many)
+
+    def parse_datetime(self, value):
+        """
+        Parse a datetime string
+        :param value: String
+        :return: Datetime object
         """
-        Normal descriptor set method
+        if self.datetime_format is not None:
+            return datetime.strptime(value, self.datetime_format)
+
+        try:
+            # Before Python 3.11, fromisoformat does not understand the "Z" suffix
+            return datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+        except (AttributeError, ValueError):
+            return parse(value)
+
+    def to_python(self, instance, value):
+        """
+        Parse datetime strings
         :param instance: Resource instance where the field lives
         :param value: Might be a datetime object or a string to be parsed
+        :return: Datetime object, or list of them
         """
         if self.many is False:
             if isinstance(value, str):
-                value = parse(value)
+                value = self.parse_datetime(value)
         else:
             datetime_list = []
             for datetime_value in value:
                 if isinstance(datetime_value, str):
-                    datetime_value = parse(datetime_value)
+                    datetime_value = self.parse_datetime(datetime_value)
                 datetime_list.append(datetime_value)
             value = datetime_list
 
-        super(DateTimeField, self).__set__(instance, value)
+        return value
 
 
 class DictField(Field):
@@ -127,28 +246,40 @@ class ResourceField(Field):
             self.value_class = getattr(module, class_name)
             self._initialized = True
 
-    def __set__(self, instance, value):
+    def get_decoder(self):
         if self._initialized is False:
             self.set_real_value_class()
 
-        if self.many is False:
-            resource = self.value_class(instance.client)
-            if isinstance(value, dict):
-                resource.update_from_dict(value)
-            else:
-                resource.update_from_dict({resource.Meta.id_field: value})
+        return super(ResourceField, self).get_decoder()
+
+    def get_resource(self, auth_client, value):
+        """
+        Get the resource for a value coming from the API
+        :param auth_client: Client of the resource where the field lives
+        :param value: Either a dictionary with the attributes of the resource, or just its id
+        :return: Resource, shared with other references to the same remote object if the auth client has an identity map
+        """
+        if isinstance(value, self.value_class):
+            return value
+        if not isinstance(value, dict):
+            value = {self.value_class.Meta.id_field: value}
+        resource = self.value_class.from_dict(auth_client, value)
+        if resource is not None:
             resource._expand = self.expand
-            value = resource
+
+        return resource
+
+    def to_python(self, instance, value):
+        """
+        Build the resources for values coming from the API
+        :param instance: Resource instance where the field lives
+        :param value: Dictionary with the attributes of the resource, its id, or the resource itself, or a list of them
+        :return: Resource, or list of resources
+        """
+        if self._initialized is False:
+            self.set_real_value_class()
+
+        if self.many is False:
+            return self.get_resource(instance.client, value)
         else:
-            resource_list = []
-            for resource_value in value:
-                resource = self.value_class(instance.client)
-                if isinstance(resource_value, dict):
-                    resource.update_from_dict(resource_value)
-                else:
-                    resource.update_from_dict({resource.Meta.id_field: resource_value})
-                resource._expand = self.expand
-                resource_list.append(resource)
-            value = resource_list
-
-        super(ResourceField, self).__set__(instance, value)
+            return [self.get_resource(instance.client, resource_value) for resource_value in value]
@@ -0,0 +1,62 @@
+import threading
+import weakref
+
+
+class IdentityMap(object):
+    """
+    Keeps track of the resources materialized through an auth client, so that every remote object is represented by one single
+    Python object, no matter how many times or through how many references it is retrieved
+
+    Resources are held by weak references: they are dropped from the map as soon as nothing else is using them
+    """
+    def __init__(self):
+        self.resources = weakref.WeakValueDictionary()
+        self.lock = threading.Lock()
+
+    def get(self, resource_class, resource_id):
+        """
+        Get the instance that represents a remote object
+        :param resource_class: Resource class
+        :param resource_id: Resource id
+        :return: The resource, or None if it is not in the map
+        """
+        return self.resources.get((resource_class, resource_id))
+
+    def add(self, resource, resource_id=None):
+        """
+        Add a resource to the map, unless there is already an instance for the same remote object. Resources that cannot be weakly
+        referenced are not added
+        :param resource: Resource to be added
+        :param resource_id: Id of the remote object, if it has not been set on the resource yet
+        :return: The instance that ends up in the map, which is not resource if there was one already
+        """
+        if resource_id is None:
+            resource_id = resource.get_id()
+
+        if not type(resource).__weakrefoffset__:
+            return resource  # Plain Resource instances, and compact ones without Meta.weakref, cannot be weakly referenced
+
+        with self.lock:
+            return self.resources.setdefault((type(resource), resource_id), resource)
+
+    def remove(self, resource):
+        """
+        Remove a resource from the map
+        :param resource: Resource to be removed
+        :return:
+        """
+        with self.lock:
+            key = (type(resource), resource.get_id())
+            if self.resources.get(key) is resource:
+                del self.resources[key]
+
+    def clear(self):
+        """
+        Remove all the resources from the map
+        :return:
+        """
+        with self.lock:
+            self.resources.clear()
+
+    def __len__(self):
+        return len(self.resources)
@@ -0,0 +1,71 @@
+import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONCodec(object):
+    """
+    Pair of functions used by auth clients to decode response bodies and to encode request bodies
+
+    Any loads/dumps pair with the signatures of the standard library ones will do. dumps may return either text or bytes
+    """
+    def __init__(self, loads=json.loads, dumps=json.dumps):
+        """
+        :param loads: Function that takes a JSON document, as bytes, and returns the decoded data
+        :param dumps: Function that takes some data and returns it encoded as a JSON document
+        """
+        self.loads = loads
+        self.dumps = dumps
+
+    def decode(self, content):
+        """
+        :param content: Raw response body
+        :return: Decoded data
+        """
+        return self.loads(content)
+
+    def encode(self, data):
+        """
+        :param data: Data to be sent
+        :return: JSON document, as UTF-8 bytes
+        """
+        document = self.dumps(data)
+        return document.encode("utf-8") if not isinstance(document, bytes) else document
+
+
+def orjson_dumps(data):
+    """
+    orjson's dumps, accepting dictionaries with keys other than strings, as the standard library does
+    :param data: Data to be encoded
+    :return: JSON document, as bytes
+    """
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+def get_default_codec():
+    """
+    Get the default codec: the standard library's loads and dumps, which accept any JSON document, such as integers of any size or
+    NaN and Infinity
+    :return: JSONCodec
+    """
+    return JSONCodec()
+
+
+def get_fast_codec():
+    """
+    Get the fastest codec available: orjson, ujson or the standard library, in that order. Request bodies may be encoded slightly
+    differently than with the standard library, and some documents the standard library accepts may be rejected, such as integers
+    above 64 bits or NaN and Infinity for orjson (see the docs of each library)
+    :return: JSONCodec
+    """
+    if orjson is not None:
+        return JSONCodec(orjson.loads, orjson_dumps)
+    if ujson is not None:
+        return JSONCodec(ujson.loads, ujson.dumps)
+    return JSONCodec()
@@ -0,0 +1,191 @@
+import re
+import threading
+from urllib.parse import urlparse
+
+from .exceptions import ERRORS
+
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{16,})$")
+
+
+class Histogram(object):
+    """
+    Cumulative histogram, as Prometheus histograms are
+    """
+    def __init__(self, buckets):
+        """
+        :param buckets: Upper bounds of the buckets, in increasing order
+        """
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for i, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self):
+        return {"count": self.count, "sum": self.sum,
+                "buckets": dict((upper_bound, count) for upper_bound, count in zip(self.buckets, self.counts))}
+
+
+class MetricsCollector(object):
+    """
+    Collects metrics of the requests sent by auth clients, per endpoint and HTTP method: latency, request and response sizes, status
+    codes and errors, named after the exceptions in pyrestcli.exceptions. The number of pages retrieved by every manager filter is
+    collected too
+
+    Endpoints are identified by their URL path, where ids are replaced with {id}, so that /api/persons/1/ and /api/persons/2/ are
+    the same endpoint
+    """
+    latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    size_buckets = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+    page_buckets = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+    def __init__(self, namespace="pyrestcli"):
+        """
+        :param namespace: Prefix of the metric names in the Prometheus export
+        """
+        self.namespace = namespace
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.latency = {}
+            self.request_size = {}
+            self.response_size = {}
+            self.statuses = {}
+            self.errors = {}
+            self.filter_pages = {}
+
+    def get_endpoint(self, url):
+        """
+        :param url: Absolute URL
+        :return: URL path, with ids replaced with {id}
+        """
+        return "/".join("{id}" if ID_SEGMENT.match(segment) else segment for segment in urlparse(url).path.split("/"))
+
+    def after_response(self, http_method, url, requests_args, response, elapsed, error=None):
+        """
+        Record a request. Meant to be used as an after_response hook of auth clients
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs sent to requests (or httpx)
+        :param response: Response, or None if the request failed
+        :param elapsed: Time taken by the request, in seconds
+        :param error: Exception raised by the request, if any
+        :return:
+        """
+        key = (self.get_endpoint(url), http_method.upper())
+
+        body = requests_args.get("data") or requests_args.get("content")
+        request_size = len(body) if isinstance(body, (bytes, str)) else None
+        response_size = None
+        if response is not None:
+            try:
+                response_size = int(response.headers["Content-Length"])
+            except (KeyError, ValueError):
+                if not requests_args.get("stream"):
+                    response_size = len(response.content)
+
+        with self.lock:
+            self.get_histogram(self.latency, key, self.latency_buckets).observe(elapsed)
+            if request_size is not None:
+                self.get_histogram(self.request_size, key, self.size_buckets).observe(request_size)
+            if response_size is not None:
+                self.get_histogram(self.response_size, key, self.size_buckets).observe(response_size)
+
+            if response is not None:
+                status_key = key + (response.status_code,)
+                self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+                error_name = ERRORS.get(response.status_code, "BaseException") if response.status_code >= 400 else None
+            else:
+                error_name = type(error).__name__
+            if error_name is not None:
+                error_key = key + (error_name,)
+                self.errors[error_key] = self.errors.get(error_key, 0) + 1
+
+    def record_filter(self, url, pages):
+        """
+        Record the number of pages retrieved by a manager filter
+        :param url: Absolute URL of the collection
+        :param pages: Number of pages
+        :return:
+        """
+        with self.lock:
+            self.get_histogram(self.filter_pages, self.get_endpoint(url), self.page_buckets).observe(pages)
+
+    @staticmethod
+    def get_histogram(histograms, key, buckets):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(buckets)
+        return histogram
+
+    def to_dict(self):
+        """
+        :return: Dictionary with the metrics of every "METHOD /endpoint/" under "requests", and the pages of the filters on every
+                 collection under "filters"
+        """
+        with self.lock:
+            requests = {}
+            for (endpoint, http_method), histogram in self.latency.items():
+                key = (endpoint, http_method)
+                requests["{method} {endpoint}".format(method=http_method, endpoint=endpoint)] = {
+                    "latency": histogram.to_dict(),
+                    "request_size": self.request_size[key].to_dict() if key in self.request_size else None,
+                    "response_size": self.response_size[key].to_dict() if key in self.response_size else None,
+                    "statuses": dict((status, count) for (e, m, status), count in self.statuses.items() if (e, m) == key),
+                    "errors": dict((name, count) for (e, m, name), count in self.errors.items() if (e, m) == key),
+                }
+            filters = dict((endpoint, histogram.to_dict()) for endpoint, histogram in self.filter_pages.items())
+
+        return {"requests": requests, "filters": filters}
+
+    def to_prometheus(self):
+        """
+        :return: Metrics in the Prometheus text exposition format
+        """
+        lines = []
+        with self.lock:
+            self.add_histograms(lines, "request_duration_seconds", "Time taken by API requests", ("endpoint", "method"), self.latency)
+            self.add_histograms(lines, "request_size_bytes", "Size of API request bodies", ("endpoint", "method"), self.request_size)
+            self.add_histograms(lines, "response_size_bytes", "Size of API response bodies", ("endpoint", "method"), self.response_size)
+            self.add_counters(lines, "responses_total", "API responses by status code", ("endpoint", "method", "status"), self.statuses)
+            self.add_counters(lines, "errors_total", "Failed API requests by exception", ("endpoint", "method", "exception"), self.errors)
+            self.add_histograms(lines, "filter_pages", "Pages retrieved by manager filters", ("endpoint",),
+                                dict(((endpoint,), histogram) for endpoint, histogram in self.filter_pages.items()))
+
+        return "\n".join(lines) + "\n"
+
+    def add_histograms(self, lines, name, description, label_names, histograms):
+        if not histograms:
+            return
+        name = "{namespace}_{name}".format(namespace=self.namespace, name=name)
+        lines.append("# HELP {name} {description}".format(name=name, description=description))
+        lines.append("# TYPE {name} histogram".format(name=name))
+        for label_values, histogram in sorted(histograms.items()):
+            labels = self.format_labels(label_names, label_values)
+            for upper_bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append('{name}_bucket{{{labels},le="{le}"}} {count}'.format(name=name, labels=labels, le=upper_bound, count=count))
+            lines.append('{name}_bucket{{{labels},le="+Inf"}} {count}'.format(name=name, labels=labels, count=histogram.count))
+            lines.append("{name}_sum{{{labels}}} {sum}".format(name=name, labels=labels, sum=histogram.sum))
+            lines.append("{name}_count{{{labels}}} {count}".format(name=name, labels=labels, count=histogram.count))
+
+    def add_counters(self, lines, name, description, label_names, counters):
+        if not counters:
+            return
+        name = "{namespace}_{name}".format(namespace=self.namespace, name=name)
+        lines.append("# HELP {name} {description}".format(name=name, description=description))
+        lines.append("# TYPE {name} counter".format(name=name))
+        for label_values, count in sorted(counters.items()):
+            lines.append("{name}{{{labels}}} {count}".format(name=name, labels=self.format_labels(label_names, label_values), count=count))
+
+    @staticmethod
+    def format_labels(label_names, label_values):
+        return ",".join('{name}="{value}"'.format(name=name, value=str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                        for name, value in zip(label_names, label_values))
@@ -1,14 +1,43 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+
+
 class Paginator(object):
+    client = None  # Auth client of the manager using the paginator, set by the manager
+
     def __init__(self, base_url, params=None):
         self.base_url = base_url
         self.params = params or {}
 
+    def get_response_json(self, response):
+        """
+        Decode the JSON body of a page. Bodies are decoded through the auth client when there is one, so that the manager does not have
+        to decode them again
+        :param response: Response
+        :return: Decoded data
+        """
+        if self.client is not None:
+            return self.client.get_response_json(response)
+        return response.json()
+
     def get_urls(self, initial_url):
         raise NotImplemented
 
     def process_response(self):
         raise NotImplemented
 
+    def get_responses(self, send, initial_url):
+        """
+        Request every page of the collection, in order
+        :param send: Callable that gets a URL and its pagination params, sends the request and returns the response
+        :param initial_url: URL of the first page
+        :return: A generator of processed responses
+        """
+        for url, params in self.get_urls(initial_url):
+            yield self.process_response(send(url, params))
+
 
 class DummyPaginator(Paginator):
     def get_urls(self, initial_url):
@@ -22,16 +51,159 @@ class DummyPaginator(Paginator):
 
 
 class NextWithUrlPaginator(Paginator):
+    """
+    Follows the URL found in the "next" attribute of every page
+
+    If prefetch is greater than zero, the next page is requested on a background thread as soon as its URL is known, while the
+    current page is still being consumed. prefetch is the maximum number of pages that can be requested ahead of the consumer
+    """
+    prefetch = 0
+
+    def get_responses(self, send, initial_url):
+        if not self.prefetch:
+            for response in super(NextWithUrlPaginator, self).get_responses(send, initial_url):
+                yield response
+            return
+
+        pages = Queue()
+        slots = threading.Semaphore(self.prefetch)
+        stopped = threading.Event()
+
+        def fetch_pages():
+            try:
+                for url, params in self.get_urls(initial_url):
+                    while not slots.acquire(timeout=0.1):
+                        if stopped.is_set():
+                            return
+                    if stopped.is_set():
+                        return
+                    pages.put((self.process_response(send(url, params)), None))
+            except Exception as e:
+                pages.put((None, e))
+            finally:
+                pages.put((None, None))
+
+        fetcher = threading.Thread(target=fetch_pages)
+        fetcher.daemon = True
+        fetcher.start()
+
+        try:
+            while True:
+                response, error = pages.get()
+                if error is not None:
+                    raise error
+                if response is None:
+                    break
+                slots.release()
+                yield response
+        finally:
+            stopped.set()
+
     def get_urls(self, initial_url):
         self.url = initial_url
         while self.url is not None:
             yield self.url, self.params
 
     def process_response(self, response):
-        response_json = response.json()
+        response_json = self.get_response_json(response)
         try:
             self.url = response_json["next"].replace(self.base_url, "")
         except AttributeError:
             self.url = None
 
         return response
+
+
+class CountPaginator(Paginator):
+    """
+    Base class for paginators of APIs that return the total number of items (count) on every page
+
+    As soon as the first page arrives, the params of every other page are computed and those pages are requested concurrently on a
+    thread pool, with up to concurrency requests in flight. Responses are still yielded in order.
+
+    Subclasses need to implement get_page_params
+    """
+    count_attribute = "count"
+    results_attribute = "results"  # Set to the json_collection_attribute of the manager using the paginator
+    page_size = None  # If None, the size of the first page will be used
+    concurrency = 4
+
+    def get_page_params(self, page_index):
+        """
+        Get the query params for a specific page
+        :param page_index: Zero-based index of the page
+        :return: Dictionary with the query params
+        """
+        raise NotImplementedError
+
+    def get_page_count(self):
+        """
+        Get the total number of pages, according to the count and page size found in the first page
+        :return: Number of pages
+        """
+        if not self.count or not self.page_size:
+            return 1
+        return (self.count + self.page_size - 1) // self.page_size
+
+    def get_urls(self, initial_url):
+        self.count = None
+        page_index = 0
+        while self.count is None or page_index < self.get_page_count():
+            params = dict(self.params)
+            params.update(self.get_page_params(page_index))
+            yield initial_url, params
+            page_index += 1
+
+    def process_response(self, response):
+        if self.count is None:
+            response_json = self.get_response_json(response)
+            self.count = response_json.get(self.count_attribute) or 0
+            if self.page_size is None:
+                self.page_size = len(response_json.get(self.results_attribute) or [])
+            if self.count and not self.page_size:
+                raise ValueError("No items found in the {attribute!r} attribute of the first page, out of {count}".format(
+                    attribute=self.results_attribute, count=self.count))
+
+        return response
+
+    def get_responses(self, send, initial_url):
+        urls = self.get_urls(initial_url)
+
+        url, params = next(urls)
+        yield self.process_response(send(url, params))
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        pending = deque()
+        try:
+            for url, params in urls:
+                pending.append(executor.submit(send, url, params))
+                if len(pending) >= self.concurrency:
+                    yield self.process_response(pending.popleft().result())
+            while pending:
+                yield self.process_response(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+class PageNumberPaginator(CountPaginator):
+    """
+    Requests pages by number (?page=2), as Django REST Framework's PageNumberPagination does
+    """
+    page_query_param = "page"
+
+    def get_page_params(self, page_index):
+        return {self.page_query_param: page_index + 1} if page_index > 0 else {}
+
+
+class LimitOffsetPaginator(CountPaginator):
+    """
+    Requests pages by limit and offset (?limit=100&offset=200), as Django REST Framework's LimitOffsetPagination does
+    """
+    limit_query_param = "limit"
+    offset_query_param = "offset"
+    page_size = 100
+
+    def get_page_params(self, page_index):
+        return {self.limit_query_param: self.page_size, self.offset_query_param: page_index * self.page_size}
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from urllib.parse import urlparse
+
+
+class TokenBucket(object):
+    """
+    Token bucket shared by all the threads of the process. It is refilled at rate tokens per second, up to burst tokens, and every
+    request takes one token. Time is measured with a monotonic clock, so that changes of the system clock do not refill it
+    """
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: Requests per second
+        :param burst: Maximum number of requests that can be sent at once after some idle time. Defaults to rate
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.burst
+        self.timestamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self, tokens, timestamp, now):
+        """
+        Take one token out of the bucket, if there is any
+        :param tokens: Tokens in the bucket at timestamp
+        :param timestamp: Time the bucket was last updated
+        :param now: Current time
+        :return: Tuple with the tokens left in the bucket, and the time to wait until there is a token available (0 if one was taken)
+        """
+        tokens = min(self.burst, tokens + max(0.0, now - timestamp) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        return tokens, (1 - tokens) / self.rate
+
+    def take(self):
+        """
+        Take one token out of the bucket, if there is any
+        :return: 0 if a token was taken, otherwise the time to wait until there is one available, in seconds
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens, wait = self.refill(self.tokens, self.timestamp, now)
+            self.timestamp = now
+            return wait
+
+    def acquire(self):
+        """
+        Block until a token is taken
+        :return:
+        """
+        wait = self.take()
+        while wait > 0:
+            time.sleep(wait)
+            wait = self.take()
+
+    async def aacquire(self):
+        """
+        Wait without blocking the event loop until a token is taken
+        :return:
+        """
+        wait = self.take()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self.take()
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a lock file, so that it is shared by every process on the host that uses the same key
+
+    Platforms without fcntl (Windows) fall back to sharing the bucket among the threads of the process only
+    """
+    def __init__(self, rate, burst=None, key="default", directory=None):
+        """
+        :param rate: Requests per second
+        :param burst: Maximum number of requests that can be sent at once after some idle time. Defaults to rate
+        :param key: Name of the bucket. Processes using the same key draw from the same bucket
+        :param directory: Directory for the lock file. Defaults to the system temporary directory
+        """
+        super(FileTokenBucket, self).__init__(rate, burst)
+        self.path = os.path.join(directory or tempfile.gettempdir(), "pyrestcli-{key}.bucket".format(key=key))
+
+    def take(self):
+        with self.lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                now = time.time()  # Monotonic clocks cannot be compared across processes, so the file keeps wall-clock time
+                try:
+                    tokens, timestamp = (float(value) for value in os.read(fd, 64).decode("ascii").split())
+                except ValueError:
+                    tokens, timestamp = self.burst, now
+                tokens, wait = self.refill(tokens, timestamp, now)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, "{tokens!r} {now!r}".format(tokens=tokens, now=now).encode("ascii"))
+                return wait
+            finally:
+                os.close(fd)  # Closing the file releases the lock
+
+
+class RateLimiter(object):
+    """
+    Paces the requests sent by an auth client, making them wait until their bucket has a token
+
+    Requests take their token from the bucket of the first rule that matches their HTTP method and URL, or from the default bucket
+    """
+    def __init__(self, bucket=None):
+        """
+        :param bucket: Default bucket. If None, requests that do not match any rule are not limited
+        """
+        self.bucket = bucket
+        self.rules = []
+
+    def add_rule(self, bucket, method=None, prefix=None):
+        """
+        Limit some requests with their own bucket
+        :param bucket: Bucket for the requests that match this rule
+        :param method: HTTP method the rule applies to, or None for all of them
+        :param prefix: Start of the URL, or of its path, that the rule applies to, or None for all of them
+        :return:
+        """
+        self.rules.append((method.lower() if method is not None else None, prefix, bucket))
+
+    def get_bucket(self, http_method, url):
+        """
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :return: Bucket for the request, or None if it is not limited
+        """
+        for method, prefix, bucket in self.rules:
+            if method is not None and method != http_method.lower():
+                continue
+            if prefix is not None and not (url.startswith(prefix) or urlparse(url).path.startswith(prefix)):
+                continue
+            return bucket
+        return self.bucket
+
+    def acquire(self, http_method, url):
+        """
+        Block until the request can be sent
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :return:
+        """
+        bucket = self.get_bucket(http_method, url)
+        if bucket is not None:
+            bucket.acquire()
+
+    async def aacquire(self, http_method, url):
+        """
+        Wait without blocking the event loop until the request can be sent
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :return:
+        """
+        bucket = self.get_bucket(http_method, url)
+        if bucket is not None:
+            await bucket.aacquire()
@@ -1,21 +1,26 @@
+import asyncio
 import requests
-from six import with_metaclass, iteritems
-from future.utils import python_2_unicode_compatible
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from itertools import islice
 from datetime import datetime
-try:
-    from urllib.parse import urljoin
-except ImportError:
-    from urlparse import urljoin
+from urllib.parse import urljoin
 
 from .fields import Field
 from .paginators import DummyPaginator
 from .exceptions import NotFoundException
 
 
+MANAGER_CLASSES = {}  # Manager classes declared for each resource class, in order of declaration (see Manager.get_related_manager)
+
+
 class APIConnected(object):
     """
     This class handle API endpoints and interfaces with the authorization client for actually sending requests
     """
+    __slots__ = ("client",)  # Subclasses without __slots__ (any but compact resources) get an instance dict anyway
+
     class Meta:
         """
         This class hosts all the configuration parameters of the main class
@@ -71,13 +76,65 @@ class APIConnected(object):
         return self.client.send(url, http_method, **client_args)
 
 
+DecodePlan = namedtuple("DecodePlan", ["plain_fields", "decoders", "lazy_fields"])
+DecodePlan.__doc__ = """
+What must be done with each key of the data dictionaries that come from the API for one resource class
+:param plain_fields: Names of the fields whose values can be stored as they come in the instance dict
+:param decoders: Dictionary with the function that stores the value of each of the other fields (see Field.get_decoder)
+:param lazy_fields: Names of the fields whose values are kept raw until they are accessed (see Resource.Meta.lazy)
+"""
+
+
+class BulkResult(namedtuple("BulkResult", ["resource", "exception"])):
+    """
+    Outcome of a bulk operation for one resource
+    :param resource: Resource
+    :param exception: Exception raised while working on the resource, or None if it succeeded
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+
 class ResourceMetaclass(type):
     """
     Handle all the work that needs to be done on class initialization to deal with fields
     """
+    def __new__(mcs, name, bases, nmspc):
+        """
+        In compact mode (Meta.compact = True), give the class one slot per field, instead of an instance dict. A weak reference slot
+        is only added if Meta.weakref is True
+        :param mcs: Metaclass
+        :param name: Class name
+        :param bases: Class inheritance
+        :param nmspc: Class namespace
+        :return: Class object
+        """
+        compact = getattr(nmspc["Meta"], "compact", None) if "Meta" in nmspc else None
+        if compact is None:
+            compact = any(getattr(getattr(klass, "Meta", None), "compact", False) for klass in bases)
+
+        if compact and "__slots__" not in nmspc:
+            slots = [mcs.get_slot_name(attribute_name) for attribute_name, attribute in nmspc.items() if isinstance(attribute, Field)]
+            weakref = getattr(nmspc["Meta"], "weakref", None) if "Meta" in nmspc else None
+            if weakref is None:
+                weakref = any(getattr(getattr(klass, "Meta", None), "weakref", False) for klass in bases)
+            if weakref and not any(klass.__weakrefoffset__ for klass in bases):
+                slots.append("__weakref__")
+            nmspc = dict(nmspc, __slots__=tuple(slots))
+
+        return super(ResourceMetaclass, mcs).__new__(mcs, name, bases, nmspc)
+
+    @staticmethod
+    def get_slot_name(field_name):
+        return "_field_" + field_name
+
     def __init__(cls, name, bases, nmspc):
         """
-        Manage Meta inheritance and create the self.fields list of field attributes
+        Manage Meta inheritance and create the self.fields list of field attributes, and the self.field_map dictionary to look them
+        up by name
         :param cls: Class object
         :param name: Class name
         :param bases: Class inheritance
@@ -88,34 +145,65 @@ class ResourceMetaclass(type):
 
         for klass in bases:
             if hasattr(klass, "Meta"):
-                for attribute_name, attribute in iteritems(klass.Meta.__dict__):
+                for attribute_name, attribute in klass.Meta.__dict__.items():
                     if not (attribute_name.startswith("__") or hasattr(cls.Meta, attribute_name)):
                         setattr(cls.Meta, attribute_name, attribute)
 
         cls.fields = []
-        for attribute_name, attribute in iteritems(cls.__dict__):
+        cls.field_map = {}
+        cls._decode_plan = None  # Built the first time a resource of this class is decoded, see get_decode_plan
+        for attribute_name, attribute in cls.__dict__.items():
             if isinstance(attribute, Field):
                 attribute.name = attribute_name
+                attribute.slot = cls.__dict__.get(cls.get_slot_name(attribute_name))
+                attribute.lazy = bool(getattr(cls.Meta, "lazy", False)) and attribute.needs_conversion()
                 cls.fields.append(attribute_name)
+                cls.field_map[attribute_name] = attribute
 
 
-@python_2_unicode_compatible
-class Resource(with_metaclass(ResourceMetaclass, APIConnected)):
+class Resource(APIConnected, metaclass=ResourceMetaclass):
     """
     Resource on the REST API
 
     API attributes are expected to be defined as attributes on the class by using fields. Configuration parameters go in the Meta class
     """
+    # _loaded_fields holds the names of the fields retrieved from the API, if not all of them were (see from_partial_dict)
+    __slots__ = ("_expand", "_dirty_fields", "_raw_values", "_loaded_fields")
+
     class Meta:
         """
         This class hosts all the configuration parameters of the main class
         :param id_field: Name of the field that acts as the unique API identifier for the resouce
         :param name_field: Name of the field whose value can be used as a friendly representation of the resource
         :param json_data: Whether the API expects data to be sent as json or not
+        :param ids_filter: Name of the collection filter that takes a comma-separated list of ids (e.g. "id__in"), if the API has one
+        :param ids_filter_batch_size: Maximum number of ids sent on each request that uses ids_filter
+        :param update_method: HTTP method used to update existing resources. With "patch", only the fields that changed since the
+                              resource was last synced with the server are sent. With "put", all the fields are sent
+        :param compact: If True, instances store their fields in slots instead of in a dict, which takes much less memory. They
+                        cannot hold attributes other than their fields
+        :param weakref: If True, instances of compact resources can be weakly referenced, as identity maps need. Other resources always
+                        can
+        :param lazy: If True, values of fields that need converting (datetimes, nested resources...) are kept as they come from the
+                     API and converted the first time they are accessed, so that fields that are never read cost nothing
+        :param batch_endpoint: Relative path to an endpoint that creates (post), updates (update_method) or deletes (delete) many
+                               resources at once, taking a JSON array with their data (or their ids, to delete them), if the API has one
+        :param batch_size: Maximum number of resources sent on each request to batch_endpoint
+        :param fields_param: Name of the query param that takes a comma-separated list of the fields the API must return (e.g. "fields"),
+                             if the API has one. Used by managers when only some fields are asked for
         """
         id_field = "id"
         name_field = "id"
         json_data = True
+        ids_filter = None
+        ids_filter_batch_size = 100
+        update_method = "patch"
+        compact = False
+        weakref = False
+        lazy = False
+        batch_endpoint = None
+        batch_size = 100
+        fields_param = None
 
     def __init__(self, auth_client, **kwargs):
         """
@@ -124,11 +212,115 @@ class Resource(with_metaclass(ResourceMetaclass, APIConnected)):
         :param kwargs: Initial value for attributes
         :return:
         """
-        for name, value in iteritems(kwargs):
+        for name, value in kwargs.items():
             setattr(self, name, value)
 
         super(Resource, self).__init__(auth_client)
 
+    @classmethod
+    def get_decode_plan(cls):
+        """
+        Get the decode plan of the class, building it if needed. The plan is built the first time a resource is decoded, instead of
+        when the class is created, so that the classes of nested resources can be imported by then
+        :return: DecodePlan
+        """
+        decode_plan = cls.__dict__.get("_decode_plan")
+        if decode_plan is None:
+            plain_fields, decoders, lazy_fields = set(), {}, set()
+            for field_name, field in cls.field_map.items():
+                decoder = field.get_decoder()
+                if field.lazy:
+                    lazy_fields.add(field_name)
+                elif decoder is not None:
+                    decoders[field_name] = decoder
+                else:
+                    plain_fields.add(field_name)
+            decode_plan = cls._decode_plan = DecodePlan(frozenset(plain_fields), decoders, frozenset(lazy_fields))
+
+        return decode_plan
+
+    @classmethod
+    def from_dict(cls, auth_client, attribute_dict):
+        """
+        Get the resource that represents the data dictionary taken out of an API response
+
+        If the auth client has an identity map, the instance already representing the same remote object is updated and returned,
+        instead of creating a new one. Fields changed on that instance and not saved yet keep their values
+        :param auth_client: Client to make (non)authorized requests
+        :param attribute_dict: Dictionary to be mapped into object attributes
+        :return: Resource, or None if the resource class cannot be instantiated
+        """
+        resource, created = cls.get_instance(auth_client, attribute_dict)
+        if resource is not None:
+            resource.update_from_dict(attribute_dict if created else resource.get_clean_data(attribute_dict))
+
+        return resource
+
+    @classmethod
+    def from_partial_dict(cls, auth_client, attribute_dict, field_names):
+        """
+        Get the resource that represents the data dictionary taken out of an API response that was asked for some fields only
+
+        Only those fields are decoded. New resources are marked as partial, so that saving them does not overwrite the fields that were
+        not loaded
+        :param auth_client: Client to make (non)authorized requests
+        :param attribute_dict: Dictionary to be mapped into object attributes
+        :param field_names: Names of the fields asked for
+        :return: Resource, or None if the resource class cannot be instantiated
+        """
+        resource, created = cls.get_instance(auth_client, attribute_dict)
+        if created:
+            resource._loaded_fields = frozenset(field_names)
+        if resource is not None:
+            resource.update_from_dict(attribute_dict if created else resource.get_clean_data(attribute_dict), only=field_names)
+
+        return resource
+
+    @classmethod
+    def get_instance(cls, auth_client, attribute_dict):
+        """
+        Get the instance that must represent the data dictionary: the one already representing the same remote object in the identity
+        map of the auth client, if any, or a new one
+        :param auth_client: Client to make (non)authorized requests
+        :param attribute_dict: Dictionary to be mapped into object attributes
+        :return: Tuple with the resource (None if the resource class cannot be instantiated) and whether it has just been created
+        """
+        identity_map = getattr(auth_client, "identity_map", None)
+        resource_id = attribute_dict.get(cls.Meta.id_field) if identity_map is not None else None
+
+        resource = identity_map.get(cls, resource_id) if resource_id is not None else None
+        if resource is not None:
+            return resource, False
+
+        try:
+            resource = cls(auth_client)
+        except (ValueError, TypeError):
+            return None, False
+        if resource_id is not None:
+            mapped_resource = identity_map.add(resource, resource_id)
+            return mapped_resource, mapped_resource is resource
+        return resource, True
+
+    @classmethod
+    def from_dicts(cls, auth_client, attribute_dicts, only=None):
+        """
+        Build the resources for many data dictionaries, such as the items of a page of the collection. Items whose resource cannot be
+        instantiated are skipped, while errors decoding their data are raised
+        :param auth_client: Client to make (non)authorized requests
+        :param attribute_dicts: Iterable of dictionaries to be mapped into object attributes
+        :param only: Names of the fields to be decoded, if only some of them were asked for (see from_partial_dict)
+        :return: A generator of resources
+        """
+        cls.get_decode_plan()  # Nested resource classes are resolved now, rather than in the middle of the first item
+
+        for attribute_dict in attribute_dicts:
+            if only is None:
+                resource = cls.from_dict(auth_client, attribute_dict)
+            else:
+                resource = cls.from_partial_dict(auth_client, attribute_dict, only)
+            if resource is not None:
+                yield resource
+
     def __str__(self):
         """
         Give a nice representation for the resource
@@ -146,15 +338,109 @@ class Resource(with_metaclass(ResourceMetaclass, APIConnected)):
         """
         return super(Resource, self).get_resource_endpoint(self.get_id())
 
-    def update_from_dict(self, attribute_dict):
+    def get_dirty_fields(self):
+        """
+        Get the fields that have been changed since the resource was last synced with the server
+        :return: Set of field names
+        """
+        return set(getattr(self, "_dirty_fields", None) or ())
+
+    def get_loaded_fields(self):
+        """
+        Get the fields whose values are known: all of them, unless the resource was retrieved with some fields only. Fields changed
+        since then count as known too
+        :return: List of field names
+        """
+        loaded_fields = getattr(self, "_loaded_fields", None)
+        if loaded_fields is None:
+            return self.fields
+        dirty_fields = self.get_dirty_fields()
+        return [field_name for field_name in self.fields if field_name in loaded_fields or field_name in dirty_fields]
+
+    def is_partial(self):
+        return getattr(self, "_loaded_fields", None) is not None
+
+    def get_clean_data(self, attribute_dict):
+        """
+        Leave the fields changed since the resource was last synced out of a data dictionary, so that updating a resource shared
+        through an identity map with data retrieved somewhere else does not overwrite changes that have not been saved yet
+        :param attribute_dict: Dictionary to be mapped into object attributes
+        :return: Dictionary without the changed fields
+        """
+        dirty_fields = getattr(self, "_dirty_fields", None)
+        if not dirty_fields:
+            return attribute_dict
+        return dict((field_name, value) for field_name, value in attribute_dict.items() if field_name not in dirty_fields)
+
+    def clean_fields(self, field_names):
+        """
+        Mark fields as synced with the server
+        :param field_names: Names of the fields
+        :return:
+        """
+        dirty_fields = getattr(self, "_dirty_fields", None)
+        if dirty_fields:
+            dirty_fields.difference_update(field_names)
+
+    def update_from_dict(self, attribute_dict, only=None):
         """
         Update the fields of the resource out of a data dictionary taken out of an API response
+
+        Updated fields are considered to be in sync with the server. In lazy resources (see Meta), values that need converting are
+        just kept until they are accessed
         :param attribute_dict: Dictionary to be mapped into object attributes
+        :param only: Names of the fields to be updated. Other values in the dictionary are ignored
         :return:
         """
-        for field_name, field_value in iteritems(attribute_dict):
-            if self.fields is None or field_name in self.fields:
+        if only is not None:
+            attribute_dict = dict((field_name, attribute_dict[field_name]) for field_name in only if field_name in attribute_dict)
+
+        dirty_fields = getattr(self, "_dirty_fields", None)
+        loaded_fields = getattr(self, "_loaded_fields", None)
+        if loaded_fields is not None:
+            loaded_fields = loaded_fields.union(attribute_dict)
+            self._loaded_fields = loaded_fields if not loaded_fields.issuperset(self.fields) else None
+
+        if self.fields is None:
+            for field_name, field_value in attribute_dict.items():
                 setattr(self, field_name, field_value)
+        else:
+            plain_fields, decoders, lazy_fields = self.get_decode_plan()
+            instance_dict = self.__dict__ if plain_fields else None
+            raw_values = getattr(self, "_raw_values", None) if lazy_fields else None
+
+            for field_name, field_value in attribute_dict.items():
+                if field_name in plain_fields:
+                    instance_dict[field_name] = field_value
+                elif field_name in decoders:
+                    decoders[field_name](self, field_value)
+                elif field_name in lazy_fields:
+                    if raw_values is None:
+                        raw_values = self._raw_values = {}
+                    raw_values[field_name] = field_value
+
+        if dirty_fields:
+            dirty_fields.difference_update(attribute_dict)
+        else:
+            self._dirty_fields = None
+
+    def update_from_resource(self, resource):
+        """
+        Update the fields of the resource out of another instance that represents the same remote object, such as a fresher copy
+        retrieved through a manager
+
+        Updated fields are considered to be in sync with the server
+        :param resource: Resource to copy the field values from
+        :return:
+        """
+        for field_name, field in self.field_map.items():
+            field.set_value(self, getattr(resource, field_name, None))
+
+        raw_values = getattr(self, "_raw_values", None)
+        if raw_values:
+            raw_values.clear()
+        self._dirty_fields = None
+        self._loaded_fields = getattr(resource, "_loaded_fields", None)
 
     def send(self, url, http_method, **client_args):
         """
@@ -165,8 +451,29 @@ class Resource(with_metaclass(ResourceMetaclass, APIConnected)):
         :return:
         """
         response = super(Resource, self).send(url, http_method, **client_args)
-        response_data = self.client.get_response_data(response, self.Meta.parse_json)
+        self.update_from_response_data(self.client.get_response_data(response, self.Meta.parse_json))
 
+        return response if response is not None else None
+
+    async def asend(self, url, http_method, **client_args):
+        """
+        Make the actual request to the API through an asynchronous auth client, updating the resource if necessary
+        :param url: Endpoint URL
+        :param http_method: The method used to make the request to the API
+        :param client_args: Arguments to be sent to the auth client
+        :return:
+        """
+        response = await super(Resource, self).send(url, http_method, **client_args)
+        self.update_from_response_data(await self.client.get_response_data(response, self.Meta.parse_json))
+
+        return response
+
+    def update_from_response_data(self, response_data):
+        """
+        Update the resource with the data that came back from the API, if any
+        :param response_data: Data returned by the auth client's get_response_data
+        :return:
+        """
         # Update Python object if we get back a full object from the API
         try:
             if response_data:
@@ -174,24 +481,33 @@ class Resource(with_metaclass(ResourceMetaclass, APIConnected)):
         except ValueError:
             pass
 
-        return response if response is not None else None
-
-    def save(self, force_create=False, fields=None):
+    def get_save_request(self, force_create=False, fields=None):
         """
-        Saves (creates or updates) resource on the server
+        Build the request needed to save the resource on the server
         :param force_create: If True, forces resource creation even if it already has an Id.
-        :param fields: List of fields to be saved. If None, all fields will be saved.
-        :return:
+        :param fields: List of fields to be saved. If None, all fields will be saved, except when updating with "patch" (see Meta),
+                       where only the fields that changed will be saved, and for partial resources, where only the fields that were
+                       retrieved (or changed since then) will be saved
+        :return: Tuple with the endpoint URL, the HTTP method, the arguments to be sent to the auth client and the names of the fields
+                 being saved, or None if there is nothing to be saved
         """
+        update = self.get_resource_endpoint() is not None and force_create is False
+        partial_update = update and self.Meta.update_method == "patch"
+
         values = {}
-        fields = fields or self.fields
+        if partial_update:
+            fields = fields or [field_name for field_name in self.fields if field_name in self.get_dirty_fields()]
+            if not fields:
+                return None
+        else:
+            fields = fields or self.get_loaded_fields()
 
         for field_name in fields:
             value = getattr(self, field_name)
 
             # When creating or updating, only references to other resources are sent, instead of the whole resource
             if isinstance(value, Resource):
-                if value._expand is False:
+                if getattr(value, "_expand", False) is False:
                     value = value.get_id()
                 else:
                     value = {"id": value.get_id()}
@@ -218,10 +534,42 @@ class Resource(with_metaclass(ResourceMetaclass, APIConnected)):
         json = values if self.Meta.json_data is True else None
         data = values if self.Meta.json_data is False else None
 
-        if self.get_resource_endpoint() is not None and force_create is False:
-            return self.send(self.get_resource_endpoint(), "put", headers=http_headers, json=json, data=data)
+        client_args = {"headers": http_headers, "json": json, "data": data}
+
+        if update:
+            return self.get_resource_endpoint(), self.Meta.update_method, client_args, fields
         else:
-            return self.send(self.get_collection_endpoint(), "post", headers=http_headers, json=json, data=data)
+            return self.get_collection_endpoint(), "post", client_args, fields
+
+    def save(self, force_create=False, fields=None):
+        """
+        Saves (creates or updates) resource on the server
+        :param force_create: If True, forces resource creation even if it already has an Id.
+        :param fields: List of fields to be saved. If None, all fields will be saved, except when updating with "patch" (see Meta),
+                       where only the fields that changed will be saved
+        :return:
+        """
+        save_request = self.get_save_request(force_create, fields)
+        if save_request is not None:
+            url, http_method, client_args, fields = save_request
+            response = self.send(url, http_method, **client_args)
+            self.clean_fields(fields)
+            return response
+
+    async def asave(self, force_create=False, fields=None):
+        """
+        Saves (creates or updates) resource on the server through an asynchronous auth client
+        :param force_create: If True, forces resource creation even if it already has an Id.
+        :param fields: List of fields to be saved. If None, all fields will be saved, except when updating with "patch" (see Meta),
+                       where only the fields that changed will be saved
+        :return:
+        """
+        save_request = self.get_save_request(force_create, fields)
+        if save_request is not None:
+            url, http_method, client_args, fields = save_request
+            response = await self.asend(url, http_method, **client_args)
+            self.clean_fields(fields)
+            return response
 
     def refresh(self):
         """
@@ -231,6 +579,14 @@ class Resource(with_metaclass(ResourceMetaclass, APIConnected)):
         if self.get_resource_endpoint() is not None:
             return self.send(self.get_resource_endpoint(), "get")
 
+    async def arefresh(self):
+        """
+        Refreshes a resource by checking against the API through an asynchronous auth client
+        :return:
+        """
+        if self.get_resource_endpoint() is not None:
+            return await self.asend(self.get_resource_endpoint(), "get")
+
     def delete(self):
         """
         Deletes the resource from the server; Python object remains untouched
@@ -239,6 +595,14 @@ class Resource(with_metaclass(ResourceMetaclass, APIConnected)):
         if self.get_resource_endpoint() is not None:
             return self.send(self.get_resource_endpoint(), http_method="delete")
 
+    async def adelete(self):
+        """
+        Deletes the resource from the server through an asynchronous auth client; Python object remains untouched
+        :return:
+        """
+        if self.get_resource_endpoint() is not None:
+            return await self.asend(self.get_resource_endpoint(), http_method="delete")
+
 
 class Manager(APIConnected):
     """
@@ -246,10 +610,24 @@ class Manager(APIConnected):
     :param resource_class: Resource class
     :param json_collection_attribute: Which attribute of the response json hosts the list of resources when retrieving the resource collection
     :param paginator_class: Which paginator class to use when retrieving the resource collection
+    :param concurrency: Maximum number of requests sent at the same time by operations that work on many resources at once
+    :param stream_pages: If True, pages of the collection are parsed while they are downloaded, and resources are built as their data
+                         arrives, so that memory use depends on the size of the resources instead of the size of the pages. Requires
+                         json_collection_attribute
+    :param count_attribute: Which attribute of the response json hosts the total number of resources in the collection, if any
+    :param count_header: Which response header hosts the total number of resources in the collection (X-Total-Count, for instance),
+                         if any. It takes precedence over count_attribute
+    :param page_size_param: Query param that sets the number of resources per page, if the API has one, so that count and exists
+                            can request pages with one single resource
     """
     resource_class = None
     json_collection_attribute = "data"
     paginator_class = DummyPaginator
+    concurrency = 8
+    stream_pages = False
+    count_attribute = "count"
+    count_header = None
+    page_size_param = None
 
     def __init__(self, auth_client):
         """
@@ -257,8 +635,20 @@ class Manager(APIConnected):
         :return:
         """
         self.paginator = self.paginator_class(auth_client.base_url)
+        self.paginator.client = auth_client
+        if hasattr(self.paginator, "results_attribute") and self.json_collection_attribute is not None:
+            self.paginator.results_attribute = self.json_collection_attribute
         super(Manager, self).__init__(auth_client)
 
+    def __init_subclass__(cls, **kwargs):
+        """
+        Register the managers that declare a resource class, so that other managers can use them to retrieve resources of that class
+        (see get_related_manager)
+        """
+        super(Manager, cls).__init_subclass__(**kwargs)
+        if cls.__dict__.get("resource_class") is not None:
+            MANAGER_CLASSES.setdefault(cls.resource_class, []).append(cls)
+
     @classmethod
     def get_collection_endpoint(cls):
         """
@@ -269,23 +659,42 @@ class Manager(APIConnected):
         """
         return cls.resource_class.get_collection_endpoint()
 
-    def get(self, resource_id):
+    def get(self, resource_id, only=None):
         """
         Get one single resource from the API
         :param resource_id: Id of the resource to be retrieved
+        :param only: Names of the fields to be retrieved, if not all of them are needed (see get_projection)
         :return: Retrieved resource
         """
-        response = self.send(self.get_resource_endpoint(resource_id), "get")
+        field_names, params = self.get_projection(only)
+        response = self.send(self.get_resource_endpoint(resource_id), "get", params=params)
+        response_data = self.client.get_response_data(response, self.Meta.parse_json)
 
-        try:
-            resource = self.resource_class(self.client)
-        except (ValueError, TypeError):
-            return None
-        else:
-            response_data = self.client.get_response_data(response, self.Meta.parse_json)
-        if response_data:
-            resource.update_from_dict(response_data)
-        return resource
+        return self.build_resource(response_data or {}, field_names)
+
+    def build_resource(self, response_data, field_names=None):
+        """
+        :param response_data: Data of one resource, as returned by the auth client's get_response_data
+        :param field_names: Names of the fields asked for, if not all of them were
+        :return: Resource, or None if the resource class cannot be instantiated
+        """
+        if field_names is None:
+            return self.resource_class.from_dict(self.client, response_data)
+        return self.resource_class.from_partial_dict(self.client, response_data, field_names)
+
+    def get_projection(self, only):
+        """
+        Get what is needed to retrieve some fields of the resources only. Those fields are the only ones decoded, and the API is asked
+        for them alone if it supports it (see fields_param in the resource Meta). The id field is always retrieved
+        :param only: Names of the fields to be retrieved, or None to retrieve all of them
+        :return: Tuple with the names of the fields (None for all of them) and the query params that ask the API for them
+        """
+        if only is None:
+            return None, {}
+
+        field_names = frozenset(only).union([self.resource_class.Meta.id_field])
+        fields_param = self.resource_class.Meta.fields_param
+        return field_names, {fields_param: ",".join(sorted(field_names))} if fields_param is not None else {}
 
     def get_or_none(self, resource_id):
         """
@@ -298,39 +707,492 @@ class Manager(APIConnected):
         except NotFoundException:
             return None
 
-    def filter(self, **search_args):
+    def get_many(self, resource_ids):
         """
-        Get a filtered list of resources
-        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        Get several resources from the API at once
+
+        Duplicated ids are only requested once. If the resource Meta has an ids_filter, resources are retrieved in batches through the
+        collection endpoint; otherwise, they are retrieved one by one, sending up to self.concurrency requests at the same time
+        :param resource_ids: Ids of the resources to be retrieved
+        :return: Tuple with a dictionary that maps ids to retrieved resources, and a list with the ids that were not found
+        """
+        resource_ids = list(OrderedDict.fromkeys(resource_ids))
+        resources = {}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            if self.resource_class.Meta.ids_filter is not None:
+                requested_ids = dict((str(resource_id), resource_id) for resource_id in resource_ids)
+                batch_size = self.resource_class.Meta.ids_filter_batch_size
+                batches = [resource_ids[i:i + batch_size] for i in range(0, len(resource_ids), batch_size)]
+                for batch_resources in executor.map(self.filter_by_ids, batches):
+                    for resource in batch_resources:
+                        resource_id = requested_ids.get(str(resource.get_id()))
+                        if resource_id is not None:
+                            resources[resource_id] = resource
+            else:
+                for resource_id, resource in zip(resource_ids, executor.map(self.get_or_none, resource_ids)):
+                    if resource is not None:
+                        resources[resource_id] = resource
+
+        return resources, [resource_id for resource_id in resource_ids if resource_id not in resources]
+
+    def get_related_manager(self, resource_class):
+        """
+        Get a manager for another resource class of the same API, sharing this manager's auth client
+
+        The manager is the first one declared for that resource class (a Manager subclass that sets it as its resource_class), so that
+        it comes with the configuration of the resource collection, such as its paginator. Asynchronous managers get an asynchronous one
+        :param resource_class: Resource class
+        :return: Manager
+        """
+        if resource_class is self.resource_class:
+            return type(self)(self.client)
+
+        asynchronous = isinstance(self, AsyncManager)
+        for manager_class in MANAGER_CLASSES.get(resource_class, []):
+            if issubclass(manager_class, AsyncManager) is asynchronous:
+                return manager_class(self.client)
+
+        raise ValueError("No {kind}manager is declared for {resource_class}, please give one".format(
+            kind="asynchronous " if asynchronous else "", resource_class=resource_class.__name__))
+
+    def prefetch(self, resources, *field_names, managers=None):
+        """
+        Populate the resources that other resources point to through resource fields, when the API only gives their ids
+
+        The distinct ids found across all the resources are retrieved at once with get_many, instead of refreshing every nested
+        resource, and nested resources are updated in place
+        :param resources: List of resources
+        :param field_names: Names of the resource fields to be populated
+        :param managers: Dictionary with the manager to be used for each field. Fields without one get the manager declared for their
+                         resource class (see get_related_manager)
+        :return:
+        """
+        for field_name in field_names:
+            nested_resources, manager = self.get_nested_resources(resources, field_name, managers)
+            if nested_resources:
+                retrieved_resources, missing_ids = manager.get_many(nested_resources.keys())
+                self.update_nested_resources(nested_resources, retrieved_resources)
+
+    def get_nested_resources(self, resources, field_name, managers=None):
+        """
+        Find the resources that other resources point to through a resource field, for prefetch
+        :param resources: List of resources
+        :param field_name: Name of the resource field
+        :param managers: Dictionary with the manager to be used for each field (see prefetch)
+        :return: Tuple with a dictionary that maps the ids of the nested resources to the nested resources with each id, and the
+                 manager to retrieve them with (None if there are none)
+        """
+        nested_resources = OrderedDict()
+        for resource in resources:
+            value = getattr(resource, field_name, None)
+            for nested_resource in (value if isinstance(value, list) else [value]):
+                if isinstance(nested_resource, Resource) and nested_resource.get_id() is not None:
+                    nested_resources.setdefault(nested_resource.get_id(), []).append(nested_resource)
+                    nested_resource_class = type(nested_resource)
+
+        if not nested_resources:
+            return nested_resources, None
+
+        manager = (managers or {}).get(field_name)
+        if manager is None:
+            manager = self.get_related_manager(nested_resource_class)
+
+        return nested_resources, manager
+
+    def update_nested_resources(self, nested_resources, retrieved_resources):
+        """
+        Update nested resources in place with the resources retrieved for them, for prefetch
+        :param nested_resources: Dictionary that maps ids to the nested resources with each id (see get_nested_resources)
+        :param retrieved_resources: Dictionary that maps ids to retrieved resources (see get_many)
+        :return:
+        """
+        for resource_id, retrieved_resource in retrieved_resources.items():
+            for nested_resource in nested_resources[resource_id]:
+                if nested_resource is not retrieved_resource:  # With an identity map, nested resources were updated already
+                    nested_resource.update_from_resource(retrieved_resource)
+
+    def iter_bulk(self, function, resources, batch_size=1):
+        """
+        Run an operation on many resources, in batches, sending up to self.concurrency requests at the same time. Errors do not stop
+        the operation, they are returned along with the resource they happened on
+        :param function: Callable that takes a list of resources (one batch) and does the operation on them
+        :param resources: Iterable of resources. It is consumed as the operation goes, so it can be a generator
+        :param batch_size: Maximum number of resources per batch
+        :return: A generator of BulkResult, in the same order as the resources
+        """
+        resources = iter(resources)
+        batches = iter(lambda: list(islice(resources, batch_size)), [])
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        try:
+            for batch in batches:
+                pending.append((batch, executor.submit(function, batch)))
+                if len(pending) > self.concurrency:
+                    batch, future = pending.popleft()
+                    for resource in batch:
+                        yield BulkResult(resource, future.exception())
+            while pending:
+                batch, future = pending.popleft()
+                for resource in batch:
+                    yield BulkResult(resource, future.exception())
+        finally:
+            for batch, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def send_batch(self, http_method, resources, batch_data):
+        """
+        Send a batch of resources to the batch endpoint (see the resource Meta), updating the resources with the data that comes back
+        :param http_method: HTTP method
+        :param resources: List of resources
+        :param batch_data: List with the data to be sent for each resource
+        :return: requests' response object
+        """
+        response = self.send(self.resource_class.Meta.batch_endpoint, http_method, json=batch_data)
+        self.invalidate_resources(resources)
+        self.update_from_batch(http_method, resources, self.client.get_response_data(response, self.Meta.parse_json))
+
+        return response
+
+    def invalidate_resources(self, resources):
+        """
+        Remove the responses stored for some resources from the cache of the auth client, if it has one. The cache only sees the URL of
+        the batch endpoint when they are written through it
+        :param resources: List of resources
+        :return:
+        """
+        cache = getattr(self.client, "cache", None)
+        if cache is None:
+            return
+
+        for resource in resources:
+            resource_endpoint = resource.get_resource_endpoint()
+            if resource_endpoint is not None:
+                cache.invalidate(urljoin(self.client.base_url, resource_endpoint))
+
+    def update_from_batch(self, http_method, resources, response_data):
+        """
+        Update the resources of a batch with the data that the batch endpoint sent back, if it sent one item for each of them
+        :param http_method: HTTP method the batch was sent with
+        :param resources: List of resources
+        :param response_data: Data of the response, as returned by the auth client's get_response_data
+        :return:
+        """
+        if http_method != "delete" and isinstance(response_data, list) and len(response_data) == len(resources):
+            for resource, resource_data in zip(resources, response_data):
+                resource.update_from_response_data(resource_data)
+
+    def get_batch_data(self, resources, force_create=False, fields=None):
+        """
+        Build the data to be sent to the batch endpoint to save many resources
+        :param resources: List of resources
+        :param force_create: If True, the resources are created; otherwise they are updated and their ids are sent along
+        :param fields: List of fields to be saved, as in Resource.save
+        :return: Tuple with the list of resources that have anything to be saved, the list with their data and the list with the
+                 names of the fields saved for each one
+        """
+        saved_resources, batch_data, saved_fields = [], [], []
+        for resource in resources:
+            save_request = resource.get_save_request(force_create=force_create, fields=fields)
+            if save_request is None:
+                continue
+            _, _, client_args, resource_fields = save_request
+            resource_data = client_args["json"] or client_args["data"]
+            if not force_create:
+                resource_data = dict(resource_data)
+                resource_data[resource.Meta.id_field] = resource.get_id()
+            saved_resources.append(resource)
+            batch_data.append(resource_data)
+            saved_fields.append(resource_fields)
+
+        return saved_resources, batch_data, saved_fields
+
+    def get_new_resource(self, item):
+        """
+        :param item: Resource, or dictionary with its attributes
+        :return: Resource to be created by bulk_create
+        """
+        if isinstance(item, Resource):
+            return item
+        resource = self.resource_class(self.client)
+        resource.update_from_dict(item)
+        return resource
+
+    def get_resource_by_id(self, item):
+        """
+        :param item: Resource, or its id
+        :return: Resource to be deleted by bulk_delete
+        """
+        if isinstance(item, Resource):
+            return item
+        return self.resource_class(self.client, **{self.resource_class.Meta.id_field: item})
+
+    def bulk_create(self, items):
+        """
+        Create many resources on the server, through the batch endpoint of the resource if there is one, or one by one otherwise
+        :param items: Iterable of resources, or of dictionaries with their attributes. It can be a generator
+        :return: List of BulkResult, in the same order as the items
+        """
+        def create_batch(resources):
+            if self.resource_class.Meta.batch_endpoint is None:
+                return resources[0].save(force_create=True)
+
+            resources, batch_data, saved_fields = self.get_batch_data(resources, force_create=True)
+            self.send_batch("post", resources, batch_data)
+            for resource, fields in zip(resources, saved_fields):
+                resource.clean_fields(fields)
+
+        return list(self.iter_bulk(create_batch, (self.get_new_resource(item) for item in items), self.get_bulk_batch_size()))
+
+    def bulk_update(self, resources, fields=None):
+        """
+        Save many existing resources on the server, through the batch endpoint of the resource if there is one, or one by one otherwise
+        :param resources: Iterable of resources. It can be a generator
+        :param fields: List of fields to be saved, as in Resource.save
+        :return: List of BulkResult, in the same order as the resources
+        """
+        def update_batch(resources):
+            if self.resource_class.Meta.batch_endpoint is None:
+                return resources[0].save(fields=fields)
+
+            resources, batch_data, saved_fields = self.get_batch_data(resources, fields=fields)
+            if not resources:
+                return
+            self.send_batch(self.resource_class.Meta.update_method, resources, batch_data)
+            for resource, resource_fields in zip(resources, saved_fields):
+                resource.clean_fields(resource_fields)
+
+        return list(self.iter_bulk(update_batch, resources, self.get_bulk_batch_size()))
+
+    def bulk_delete(self, resources_or_ids):
+        """
+        Delete many resources from the server, through the batch endpoint of the resource if there is one, or one by one otherwise
+        :param resources_or_ids: Iterable of resources, or of their ids. It can be a generator
+        :return: List of BulkResult, in the same order as the resources
+        """
+        def delete_batch(resources):
+            if self.resource_class.Meta.batch_endpoint is None:
+                return resources[0].delete()
+
+            self.send_batch("delete", resources, [resource.get_id() for resource in resources])
+
+        return list(self.iter_bulk(delete_batch, (self.get_resource_by_id(item) for item in resources_or_ids),
+                                   self.get_bulk_batch_size()))
+
+    def get_bulk_batch_size(self):
+        return self.resource_class.Meta.batch_size if self.resource_class.Meta.batch_endpoint is not None else 1
+
+    def filter_by_ids(self, resource_ids):
+        """
+        Get a list of resources by their ids, using the collection filter defined by the ids_filter attribute of the resource Meta
+        :param resource_ids: Ids of the resources to be retrieved
         :return: A list of resources
         """
+        return self.filter(**{self.resource_class.Meta.ids_filter: ",".join(str(resource_id) for resource_id in resource_ids)})
+
+    def get_page_resources(self, response_data, field_names=None):
+        """
+        Build the resources found in one page of the resource collection
+        :param response_data: Data of the page, as returned by the auth client's get_response_data
+        :param field_names: Names of the fields to be decoded, if not all of them were asked for
+        :return: A generator of resources
+        """
+        return self.resource_class.from_dicts(self.client, self.get_page_items(response_data), only=field_names)
+
+    def get_page_items(self, response_data):
+        """
+        :param response_data: Data of a page, as returned by the auth client's get_response_data
+        :return: Raw data of the resources in the page
+        """
+        return response_data[self.json_collection_attribute] if self.json_collection_attribute is not None else response_data
+
+    def can_stream_pages(self):
+        return self.Meta.parse_json and self.json_collection_attribute is not None
+
+    def iter_filter(self, only=None, **search_args):
+        """
+        Lazily get a filtered list of resources, one page at a time
+
+        Only the page being consumed is kept in memory, so the first resource is available right after the first round trip
+        :param only: Names of the fields to be retrieved, if not all of them are needed (see get_projection)
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: A generator of resources
+        """
+        field_names, params = self.get_projection(only)
+        search_args.update(params)
+
+        for response_data in self.iter_pages(search_args, self.stream_pages and self.can_stream_pages()):
+            for resource in self.get_page_resources(response_data, field_names):
+                yield resource
+
+    def iter_pages(self, search_args, stream=False):
+        """
+        Lazily get the data of every page of a filtered collection
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :param stream: If True, pages will be parsed while they are downloaded (see stream_pages)
+        :return: A generator of page data, as returned by the auth client's get_response_data
+        """
+        for response in self.iter_responses(search_args, stream):
+            yield self.client.get_response_data(response, self.Meta.parse_json)
+
+    def iter_responses(self, search_args, stream=False):
+        """
+        Lazily get the response of every page of a filtered collection
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :param stream: If True, pages will be parsed while they are downloaded (see stream_pages)
+        :return: A generator of requests' response objects
+        """
         search_args = search_args or {}
-        raw_resources = []
+        paginator = copy(self.paginator)  # Every iteration walks the collection with its own pagination state
 
-        for url, paginator_params in self.paginator.get_urls(self.get_collection_endpoint()):
-            search_args.update(paginator_params)
-            response = self.paginator.process_response(self.send(url, "get", params=search_args))
-            raw_resources += self.client.get_response_data(response, self.Meta.parse_json)[self.json_collection_attribute] if self.json_collection_attribute is not None else self.client.get_response_data(response, self.Meta.parse_json)
+        def send_page(url, paginator_params):
+            params = dict(search_args)
+            params.update(paginator_params)
+            if not stream:
+                return self.send(url, "get", params=params)
 
-        resources = []
+            response = self.send(url, "get", params=params, stream=True)
+            self.client.stream_response_json(response, self.json_collection_attribute)
+            return response
 
-        for raw_resource in raw_resources:
-            try:
-                resource = self.resource_class(self.client)
-            except (ValueError, TypeError):
-                continue
-            else:
-                resource.update_from_dict(raw_resource)
-                resources.append(resource)
+        pages = 0
+        try:
+            for response in paginator.get_responses(send_page, self.get_collection_endpoint()):
+                pages += 1
+                yield response
+        finally:
+            self.record_filter(pages)
+
+    def request_count(self, search_args, count_items=False):
+        """
+        Request the smallest possible page of a filtered collection, to learn how many resources there are without downloading them
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :param count_items: If True and the API does not give the total number of resources, the number of resources in the page will
+                            be returned instead
+        :return: Number of resources, or None if the API does not give it
+        """
+        params = dict(search_args)
+        if self.page_size_param is not None:
+            params[self.page_size_param] = 1
+
+        # Streamed, so that neither the body is downloaded if the count is in a header, nor the resources are decoded if it comes
+        # before them
+        response = self.send(self.get_collection_endpoint(), "get", params=params, stream=True)
+        try:
+            count = self.get_header_count(response)
+            if count is not None:
+                return count
+            if self.can_stream_pages():
+                self.client.stream_response_json(response, self.json_collection_attribute)
+            response_data = self.client.get_response_data(response, self.Meta.parse_json)
+
+            count = self.get_data_count(response_data)
+            if count is not None:
+                return count
+            if count_items:
+                return sum(1 for _ in self.get_page_items(response_data))
+        finally:
+            response.close()
+
+    def get_header_count(self, response):
+        """
+        :param response: Response of a page of the collection
+        :return: Number of resources in the collection according to count_header, or None if the API does not give it
+        """
+        if self.count_header is not None and response.status_code < 400 and self.count_header in response.headers:
+            return int(response.headers[self.count_header])
+
+    def get_data_count(self, response_data):
+        """
+        :param response_data: Data of a page of the collection, as returned by the auth client's get_response_data
+        :return: Number of resources in the collection according to count_attribute, or None if the API does not give it
+        """
+        if self.count_attribute is not None and self.can_stream_pages():  # Pages are JSON objects
+            count = response_data.get(self.count_attribute)
+            if count is not None:
+                return int(count)
+
+    def count(self, **search_args):
+        """
+        Get the number of resources in a filtered collection, without retrieving them. If the API gives no count (see count_attribute
+        and count_header), every page has to be walked through, although resources are not built
+
+        With a page_size_param, the count is asked for with the smallest possible page first. Otherwise, the first page of the
+        collection is requested right away, and its items are counted if it gives no count
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: Number of resources
+        """
+        if self.page_size_param is not None:
+            count = self.request_count(search_args)
+            if count is not None:
+                return count
+
+        count = 0
+        responses = self.iter_responses(search_args, self.can_stream_pages())
+        try:
+            for page, response in enumerate(responses):
+                response_data = self.client.get_response_data(response, self.Meta.parse_json)
+                if page == 0 and self.page_size_param is None:
+                    total = self.get_header_count(response)
+                    if total is None:
+                        total = self.get_data_count(response_data)
+                    if total is not None:
+                        return total
+                count += sum(1 for _ in self.get_page_items(response_data))
+        finally:
+            responses.close()
+        return count
+
+    def exists(self, **search_args):
+        """
+        Check whether a filtered collection has any resource, without retrieving them
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: True if there is at least one resource
+        """
+        return self.request_count(search_args, count_items=True) > 0
+
+    def record_filter(self, pages):
+        """
+        Report the number of pages retrieved by a filter to the metrics collector of the auth client, if it has one
+        :param pages: Number of pages
+        :return:
+        """
+        metrics = getattr(self.client, "metrics", None)
+        if metrics is not None:
+            metrics.record_filter(urljoin(self.client.base_url, self.get_collection_endpoint()), pages)
+
+    def iter_all(self):
+        """
+        Lazily get all the resources, one page at a time
+        :return: A generator of resources
+        """
+        return self.iter_filter()
+
+    def filter(self, prefetch=None, only=None, **search_args):
+        """
+        Get a filtered list of resources
+        :param prefetch: Names of the resource fields to be populated once all the resources are retrieved, or a dictionary with the
+                         manager to be used for each one (see Manager.prefetch)
+        :param only: Names of the fields to be retrieved, if not all of them are needed (see get_projection)
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: A list of resources
+        """
+        resources = list(self.iter_filter(only=only, **search_args))
+        if prefetch:
+            self.prefetch(resources, *prefetch, managers=prefetch if isinstance(prefetch, dict) else None)
 
         return resources
 
-    def all(self):
+    def all(self, prefetch=None, only=None):
         """
         Get a list of all the resources
+        :param prefetch: Names of the resource fields to be populated once all the resources are retrieved (see filter)
+        :param only: Names of the fields to be retrieved, if not all of them are needed (see get_projection)
         :return: A list of resources
         """
-        return self.filter()
+        return self.filter(prefetch=prefetch, only=only)
 
     def create(self, **kwargs):
         """
@@ -342,3 +1204,345 @@ class Manager(APIConnected):
         resource.save(force_create=True)
 
         return resource
+
+
+class AsyncManager(Manager):
+    """
+    Manager class for resources, to be used with asynchronous auth clients from asyncio code
+
+    Resources and paginators are the same ones used by the regular Manager
+    """
+    async def get(self, resource_id, only=None):
+        """
+        Get one single resource from the API
+        :param resource_id: Id of the resource to be retrieved
+        :param only: Names of the fields to be retrieved, if not all of them are needed (see Manager.get_projection)
+        :return: Retrieved resource
+        """
+        field_names, params = self.get_projection(only)
+        response = await self.send(self.get_resource_endpoint(resource_id), "get", params=params)
+        response_data = await self.client.get_response_data(response, self.Meta.parse_json)
+
+        return self.build_resource(response_data or {}, field_names)
+
+    async def get_or_none(self, resource_id):
+        """
+        Get one single resource from the API, return None if not found, except of raising an exception
+        :param resource_id: Id of the resource to be retrieved
+        :return: Retrieved resource
+        """
+        try:
+            return await self.get(resource_id)
+        except NotFoundException:
+            return None
+
+    async def get_many(self, resource_ids):
+        """
+        Get several resources from the API at once, sending up to self.concurrency requests at the same time (see Manager.get_many)
+        :param resource_ids: Ids of the resources to be retrieved
+        :return: Tuple with a dictionary that maps ids to retrieved resources, and a list with the ids that were not found
+        """
+        resource_ids = list(OrderedDict.fromkeys(resource_ids))
+        resources = {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limit(coroutine):
+            async with semaphore:
+                return await coroutine
+
+        if self.resource_class.Meta.ids_filter is not None:
+            requested_ids = dict((str(resource_id), resource_id) for resource_id in resource_ids)
+            batch_size = self.resource_class.Meta.ids_filter_batch_size
+            batches = [resource_ids[i:i + batch_size] for i in range(0, len(resource_ids), batch_size)]
+            for batch_resources in await asyncio.gather(*[limit(self.filter_by_ids(batch)) for batch in batches]):
+                for resource in batch_resources:
+                    resource_id = requested_ids.get(str(resource.get_id()))
+                    if resource_id is not None:
+                        resources[resource_id] = resource
+        else:
+            retrieved_resources = await asyncio.gather(*[limit(self.get_or_none(resource_id)) for resource_id in resource_ids])
+            for resource_id, resource in zip(resource_ids, retrieved_resources):
+                if resource is not None:
+                    resources[resource_id] = resource
+
+        return resources, [resource_id for resource_id in resource_ids if resource_id not in resources]
+
+    async def prefetch(self, resources, *field_names, managers=None):
+        """
+        Populate the resources that other resources point to through resource fields, when the API only gives their ids (see
+        Manager.prefetch). Managers given for the fields must be asynchronous managers
+        :param resources: List of resources
+        :param field_names: Names of the resource fields to be populated
+        :param managers: Dictionary with the manager to be used for each field. Fields without one get the manager declared for their
+                         resource class (see get_related_manager)
+        :return:
+        """
+        for field_name in field_names:
+            nested_resources, manager = self.get_nested_resources(resources, field_name, managers)
+            if nested_resources:
+                retrieved_resources, missing_ids = await manager.get_many(nested_resources.keys())
+                self.update_nested_resources(nested_resources, retrieved_resources)
+
+    async def run_bulk(self, function, resources, batch_size=1):
+        """
+        Run an operation on many resources, in batches, with up to self.concurrency batches in flight at the same time. Errors do not
+        stop the operation, they are returned along with the resource they happened on (see Manager.iter_bulk)
+        :param function: Coroutine function that takes a list of resources (one batch) and does the operation on them
+        :param resources: Iterable of resources. It is consumed as the operation goes, so it can be a generator
+        :param batch_size: Maximum number of resources per batch
+        :return: List of BulkResult, in the same order as the resources
+        """
+        async def run_batch(batch):
+            try:
+                await function(batch)
+            except Exception as e:
+                return e
+
+        resources = iter(resources)
+        batches = iter(lambda: list(islice(resources, batch_size)), [])
+        pending = deque()
+        results = []
+
+        try:
+            for batch in batches:
+                pending.append((batch, asyncio.ensure_future(run_batch(batch))))
+                if len(pending) >= self.concurrency:
+                    batch, task = pending.popleft()
+                    exception = await task
+                    results.extend(BulkResult(resource, exception) for resource in batch)
+            while pending:
+                batch, task = pending.popleft()
+                exception = await task
+                results.extend(BulkResult(resource, exception) for resource in batch)
+        finally:
+            for batch, task in pending:
+                task.cancel()
+
+        return results
+
+    async def send_batch(self, http_method, resources, batch_data):
+        """
+        Send a batch of resources to the batch endpoint (see Manager.send_batch)
+        :param http_method: HTTP method
+        :param resources: List of resources
+        :param batch_data: List with the data to be sent for each resource
+        :return: httpx's response object
+        """
+        response = await self.send(self.resource_class.Meta.batch_endpoint, http_method, json=batch_data)
+        self.update_from_batch(http_method, resources, await self.client.get_response_data(response, self.Meta.parse_json))
+
+        return response
+
+    async def bulk_create(self, items):
+        """
+        Create many resources on the server (see Manager.bulk_create)
+        :param items: Iterable of resources, or of dictionaries with their attributes
+        :return: List of BulkResult, in the same order as the items
+        """
+        async def create_batch(resources):
+            if self.resource_class.Meta.batch_endpoint is None:
+                return await resources[0].asave(force_create=True)
+
+            resources, batch_data, saved_fields = self.get_batch_data(resources, force_create=True)
+            await self.send_batch("post", resources, batch_data)
+            for resource, fields in zip(resources, saved_fields):
+                resource.clean_fields(fields)
+
+        return await self.run_bulk(create_batch, (self.get_new_resource(item) for item in items), self.get_bulk_batch_size())
+
+    async def bulk_update(self, resources, fields=None):
+        """
+        Save many existing resources on the server (see Manager.bulk_update)
+        :param resources: Iterable of resources
+        :param fields: List of fields to be saved, as in Resource.save
+        :return: List of BulkResult, in the same order as the resources
+        """
+        async def update_batch(resources):
+            if self.resource_class.Meta.batch_endpoint is None:
+                return await resources[0].asave(fields=fields)
+
+            resources, batch_data, saved_fields = self.get_batch_data(resources, fields=fields)
+            if not resources:
+                return
+            await self.send_batch(self.resource_class.Meta.update_method, resources, batch_data)
+            for resource, resource_fields in zip(resources, saved_fields):
+                resource.clean_fields(resource_fields)
+
+        return await self.run_bulk(update_batch, resources, self.get_bulk_batch_size())
+
+    async def bulk_delete(self, resources_or_ids):
+        """
+        Delete many resources from the server (see Manager.bulk_delete)
+        :param resources_or_ids: Iterable of resources, or of their ids
+        :return: List of BulkResult, in the same order as the resources
+        """
+        async def delete_batch(resources):
+            if self.resource_class.Meta.batch_endpoint is None:
+                return await resources[0].adelete()
+
+            await self.send_batch("delete", resources, [resource.get_id() for resource in resources])
+
+        return await self.run_bulk(delete_batch, (self.get_resource_by_id(item) for item in resources_or_ids),
+                                   self.get_bulk_batch_size())
+
+    async def iter_filter(self, only=None, **search_args):
+        """
+        Lazily get a filtered list of resources, one page at a time
+        :param only: Names of the fields to be retrieved, if not all of them are needed (see Manager.get_projection)
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: An asynchronous generator of resources
+        """
+        field_names, params = self.get_projection(only)
+        search_args.update(params)
+
+        async for response_data in self.iter_pages(search_args):
+            for resource in self.get_page_resources(response_data, field_names):
+                yield resource
+
+    async def iter_pages(self, search_args, stream=False):
+        """
+        Lazily get the data of every page of a filtered collection. Pages are not streamed from asyncio code
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: An asynchronous generator of page data, as returned by the auth client's get_response_data
+        """
+        responses = self.iter_responses(search_args)
+        try:
+            async for response in responses:
+                yield await self.client.get_response_data(response, self.Meta.parse_json)
+        finally:
+            await responses.aclose()
+
+    async def iter_responses(self, search_args, stream=False):
+        """
+        Lazily get the response of every page of a filtered collection. Pages are not streamed from asyncio code
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: An asynchronous generator of httpx's response objects
+        """
+        search_args = dict(search_args or {})
+        paginator = copy(self.paginator)
+
+        pages = 0
+        try:
+            for url, paginator_params in paginator.get_urls(self.get_collection_endpoint()):
+                search_args.update(paginator_params)
+                response = paginator.process_response(await self.send(url, "get", params=search_args))
+                pages += 1
+                yield response
+        finally:
+            self.record_filter(pages)
+
+    async def request_count(self, search_args, count_items=False):
+        """
+        Request the smallest possible page of a filtered collection, to learn how many resources there are (see Manager.request_count)
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :param count_items: If True and the API does not give the total number of resources, the number of resources in the page will
+                            be returned instead
+        :return: Number of resources, or None if the API does not give it
+        """
+        params = dict(search_args)
+        if self.page_size_param is not None:
+            params[self.page_size_param] = 1
+
+        response = await self.send(self.get_collection_endpoint(), "get", params=params)
+        count = self.get_header_count(response)
+        if count is not None:
+            return count
+        response_data = await self.client.get_response_data(response, self.Meta.parse_json)
+
+        count = self.get_data_count(response_data)
+        if count is not None:
+            return count
+        if count_items:
+            return len(self.get_page_items(response_data))
+
+    async def count(self, **search_args):
+        """
+        Get the number of resources in a filtered collection, without retrieving them (see Manager.count)
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: Number of resources
+        """
+        if self.page_size_param is not None:
+            count = await self.request_count(search_args)
+            if count is not None:
+                return count
+
+        count = 0
+        responses = self.iter_responses(search_args)
+        try:
+            page = 0
+            async for response in responses:
+                response_data = await self.client.get_response_data(response, self.Meta.parse_json)
+                if page == 0 and self.page_size_param is None:
+                    total = self.get_header_count(response)
+                    if total is None:
+                        total = self.get_data_count(response_data)
+                    if total is not None:
+                        return total
+                count += len(self.get_page_items(response_data))
+                page += 1
+        finally:
+            await responses.aclose()
+        return count
+
+    async def exists(self, **search_args):
+        """
+        Check whether a filtered collection has any resource, without retrieving them
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: True if there is at least one resource
+        """
+        return await self.request_count(search_args, count_items=True) > 0
+
+    def iter_all(self):
+        """
+        Lazily get all the resources, one page at a time
+        :return: An asynchronous generator of resources
+        """
+        return self.iter_filter()
+
+    async def filter(self, prefetch=None, only=None, **search_args):
+        """
+        Get a filtered list of resources
+        :param prefetch: Names of the resource fields to be populated once all the resources are retrieved, or a dictionary with the
+                         manager to be used for each one (see prefetch)
+        :param only: Names of the fields to be retrieved, if not all of them are needed (see Manager.get_projection)
+        :param search_args: To be translated into ?arg1=value1&arg2=value2...
+        :return: A list of resources
+        """
+        resources = [resource async for resource in self.iter_filter(only=only, **search_args)]
+        if prefetch:
+            await self.prefetch(resources, *prefetch, managers=prefetch if isinstance(prefetch, dict) else None)
+
+        return resources
+
+    async def all(self, prefetch=None, only=None):
+        """
+        Get a list of all the resources
+        :param prefetch: Names of the resource fields to be populated once all the resources are retrieved (see filter)
+        :param only: Names of the fields to be retrieved, if not all of them are needed (see Manager.get_projection)
+        :return: A list of resources
+        """
+        return await self.filter(prefetch=prefetch, only=only)
+
+    async def create(self, **kwargs):
+        """
+        Create a resource on the server
+        :params kwargs: Attributes (field names and values) of the new resource
+        """
+        resource = self.resource_class(self.client)
+        resource.update_from_dict(kwargs)
+        await resource.asave(force_create=True)
+
+        return resource
+
+
+def prefetch(resources, *field_names, managers=None):
+    """
+    Populate the resources that other resources point to through resource fields, retrieving them at once (see Manager.prefetch)
+    :param resources: List of resources
+    :param field_names: Names of the resource fields to be populated
+    :param managers: Dictionary with the manager to be used for each field. Fields without one get the manager declared for their
+                     resource class (see Manager.get_related_manager)
+    :return:
+    """
+    if resources:
+        Manager(resources[0].client).prefetch(resources, *field_names, managers=managers)
@@ -0,0 +1,154 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_tz, mktime_tz
+import requests
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class RetryPolicy(object):
+    """
+    Retries requests that fail because of rate limits (429), server errors (5xx) or connection problems, waiting between attempts
+    with jittered exponential backoff, or as long as the server asks for in the Retry-After header
+
+    Every request sent through an auth client with a retry policy is retried, so a failed page of a collection is requested again
+    without starting over from the first one
+    """
+    connection_errors = (requests.ConnectionError, requests.Timeout) + ((httpx.TransportError,) if httpx is not None else ())
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=60, statuses=(429, 500, 502, 503, 504),
+                 methods=("get", "head", "options", "put", "patch", "delete"), retry_post=False, jitter=True):
+        """
+        :param max_retries: Maximum number of retries for each request
+        :param backoff_factor: Base delay, in seconds. Retry n waits up to backoff_factor * 2 ** n seconds
+        :param max_backoff: Maximum delay between attempts, in seconds, including the ones asked for by the server
+        :param statuses: HTTP status codes that will be retried
+        :param methods: HTTP methods that will be retried. Only idempotent methods are retried by default. patch is among them,
+                        because resources send the values of the fields they save, not changes to them
+        :param retry_post: If True, post requests will be retried too
+        :param jitter: If True, the actual delay is a random value between zero and the computed delay
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.lower() for method in methods) | (frozenset(["post"]) if retry_post else frozenset())
+        self.jitter = jitter
+
+        self.retries = 0
+        self.backoff_time = 0.0
+        self.lock = threading.Lock()
+
+    def get_stats(self):
+        """
+        :return: Dictionary with the total number of retries and the total time spent waiting between attempts, in seconds
+        """
+        with self.lock:
+            return {"retries": self.retries, "backoff_time": self.backoff_time}
+
+    def get_retry_after(self, response):
+        """
+        Get the delay asked for by the server through the Retry-After header, if any
+        :param response: Response
+        :return: Delay in seconds, or None
+        """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            retry_date = parsedate_tz(retry_after)
+            return max(0.0, mktime_tz(retry_date) - time.time()) if retry_date is not None else None
+
+    def get_delay(self, retry, response=None):
+        """
+        Get the time to wait before the next attempt
+        :param retry: Number of retries done so far
+        :param response: Failed response, if any
+        :return: Delay in seconds
+        """
+        delay = self.get_retry_after(response)
+        if delay is None:
+            delay = self.backoff_factor * (2 ** retry)
+            if self.jitter:
+                delay = random.uniform(0, delay)
+
+        return min(delay, self.max_backoff)
+
+    def should_retry(self, retry, http_method, response=None, error=None):
+        """
+        :param retry: Number of retries done so far
+        :param http_method: HTTP method
+        :param response: Response of the last attempt, if any
+        :param error: Exception raised by the last attempt, if any
+        :return: True if the request must be sent again
+        """
+        if retry >= self.max_retries or http_method.lower() not in self.methods:
+            return False
+        if error is not None:
+            return isinstance(error, self.connection_errors)
+        return response.status_code in self.statuses
+
+    def record_retry(self, delay):
+        with self.lock:
+            self.retries += 1
+            self.backoff_time += delay
+
+    def send(self, request, http_method, url, **requests_args):
+        """
+        Send a request, retrying it as many times as needed
+        :param request: Callable that actually sends requests, with the same signature as requests' session.request
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to requests
+        :return: Response of the last attempt
+        """
+        retry = 0
+        while True:
+            try:
+                response = request(http_method, url, **requests_args)
+            except Exception as e:
+                if not self.should_retry(retry, http_method, error=e):
+                    raise
+                response = None
+            else:
+                if not self.should_retry(retry, http_method, response=response):
+                    return response
+                response.close()
+
+            delay = self.get_delay(retry, response)
+            self.record_retry(delay)
+            time.sleep(delay)
+            retry += 1
+
+    async def asend(self, request, http_method, url, **requests_args):
+        """
+        Send a request from asyncio code, retrying it as many times as needed
+        :param request: Coroutine function that actually sends requests, with the same signature as httpx's AsyncClient.request
+        :param http_method: HTTP method
+        :param url: Absolute URL
+        :param requests_args: kargs to be sent to httpx
+        :return: Response of the last attempt
+        """
+        retry = 0
+        while True:
+            try:
+                response = await request(http_method, url, **requests_args)
+            except Exception as e:
+                if not self.should_retry(retry, http_method, error=e):
+                    raise
+                response = None
+            else:
+                if not self.should_retry(retry, http_method, response=response):
+                    return response
+                await response.aclose()
+
+            delay = self.get_delay(retry, response)
+            self.record_retry(delay)
+            await asyncio.sleep(delay)
+            retry += 1
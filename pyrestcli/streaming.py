@@ -0,0 +1,227 @@
+import codecs
+import json
+import re
+from collections import deque
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+MEMBER, COLLECTION_START, ITEM, COLLECTION_END = range(4)
+
+
+class StreamingItems(object):
+    """
+    Items of the collection array of a streaming document. They are decoded one at a time as they are iterated, so they can only be
+    iterated once
+    """
+    def __init__(self, document):
+        """
+        :param document: StreamingDocument the items belong to
+        """
+        self.document = document
+        self.buffered = deque()  # Items decoded before being asked for, because a member after the array was needed first
+        self.complete = False
+        self.yielded = 0
+
+    def __iter__(self):
+        try:
+            while True:
+                if self.buffered:
+                    self.yielded += 1
+                    yield self.buffered.popleft()
+                elif self.complete or not self.document.advance():
+                    break
+        finally:
+            if self.complete:
+                self.document.finish()
+            else:
+                self.document.close()
+
+    def __len__(self):
+        """
+        Total number of items in the array. The items not iterated yet have to be decoded and kept in memory to count them
+        :return: Number of items
+        """
+        while not self.complete and self.document.advance():
+            pass
+        return self.yielded + len(self.buffered)
+
+
+class StreamingDocument(object):
+    """
+    JSON object parsed incrementally, while it is downloaded
+
+    The collection member, an array, is given as StreamingItems, so that only the item being processed has to be in memory. Other
+    members are decoded when they are asked for. If a member comes after the collection in the document, the items before it are
+    decoded and kept in memory on the way
+
+    Documents are read by one thread at a time, as pages are handed over from the paginator to the manager
+    """
+    decoder = json.JSONDecoder()
+
+    def __init__(self, chunks, collection_attribute, close=None):
+        """
+        :param chunks: Iterable of chunks (bytes) of the UTF-8 encoded document, as they are downloaded
+        :param collection_attribute: Name of the member with the collection array
+        :param close: Callable to be called once the document has been read, or when it is abandoned
+        """
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.collection_attribute = collection_attribute
+        self.on_close = close
+        self.members = {}
+        self.items = None
+        self.events = self.parse()
+
+    def __getitem__(self, key):
+        while key not in self.members:
+            if not self.advance():
+                raise KeyError(key)
+        return self.members[key]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def advance(self):
+        """
+        Parse the next member, or the next item of the collection
+        :return: False if the end of the document was reached
+        """
+        try:
+            event, value = next(self.events)
+        except StopIteration:
+            return False
+
+        if event == MEMBER:
+            self.members[value[0]] = value[1]
+        elif event == COLLECTION_START:
+            self.items = self.members[value] = StreamingItems(self)
+        elif event == ITEM:
+            self.items.buffered.append(value)
+        elif event == COLLECTION_END:
+            self.items.complete = True
+        return True
+
+    def finish(self):
+        """
+        Parse the rest of the document, once the collection has been read
+        :return:
+        """
+        while self.advance():
+            pass
+
+    def close(self):
+        self.events.close()
+        if self.on_close is not None:
+            self.on_close()
+            self.on_close = None
+
+    def read(self):
+        """
+        Add the next chunk to the buffer, dropping the part of the buffer that has already been parsed
+        :return: False if there are no more chunks
+        """
+        if self.eof:
+            return False
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.eof = True
+            self.buffer += self.text_decoder.decode(b"", final=True)
+            return False
+        self.buffer = self.buffer[self.position:] + self.text_decoder.decode(chunk)
+        self.position = 0
+        return True
+
+    def peek(self):
+        """
+        Skip whitespace
+        :return: Next character, or None at the end of the document
+        """
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read():
+                return None
+
+    def expect(self, characters):
+        """
+        Skip the next character, which must be one of the given ones
+        :param characters: Expected characters
+        :return: Character found
+        """
+        character = self.peek()
+        if character is None or character not in characters:
+            raise ValueError("Expecting one of {characters!r} at position {position}".format(characters=characters, position=self.position))
+        self.position += 1
+        return character
+
+    def decode_value(self):
+        """
+        Decode the next value, reading as many chunks as needed
+        :return: Value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except ValueError:
+                if self.read():
+                    continue
+                raise
+            # Numbers and literals at the end of the buffer may go on in the next chunk
+            if end == len(self.buffer) and self.read():
+                continue
+            self.position = end
+            return value
+
+    def parse(self):
+        """
+        Parse the document
+        :return: A generator of parsing events, with their values
+        """
+        try:
+            self.expect("{")
+            if self.peek() == "}":
+                self.position += 1
+            else:
+                while True:
+                    key = self.decode_value()
+                    if not isinstance(key, str):
+                        raise ValueError("Expecting a member name at position {position}".format(position=self.position))
+                    self.expect(":")
+                    if key == self.collection_attribute and self.peek() == "[":
+                        self.position += 1
+                        yield COLLECTION_START, key
+                        if self.peek() == "]":
+                            self.position += 1
+                        else:
+                            while True:
+                                yield ITEM, self.decode_value()
+                                if self.expect(",]") == "]":
+                                    break
+                        yield COLLECTION_END, None
+                    else:
+                        yield MEMBER, (key, self.decode_value())
+                    if self.expect(",}") == "}":
+                        break
+
+            while self.read():  # Read up to the end of the body, so that the connection can be reused
+                pass
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+                self.on_close = None
@@ -0,0 +1,109 @@
+import io
+import sys
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib.parse import urlsplit, unquote_to_bytes
+
+
+class WSGIAdapter(BaseAdapter):
+    """
+    requests transport adapter that calls a WSGI application (a Django or Flask app, for instance) in the same process, instead of
+    sending requests over the network. Requests and responses go through the same requests machinery, so managers and resources
+    work exactly as they do with a remote API
+
+    Mount it on a session for the base URL of the API, or just give the application to the auth client (see the app argument of
+    BaseAuthClient)
+    """
+    def __init__(self, app, script_name=""):
+        """
+        :param app: WSGI application
+        :param script_name: URL path the application is mounted on, if any. It is given to the application as SCRIPT_NAME
+        """
+        super(WSGIAdapter, self).__init__()
+        self.app = app
+        self.script_name = script_name.rstrip("/")
+
+    def get_environ(self, request):
+        """
+        :param request: requests' PreparedRequest
+        :return: WSGI environ for the request
+        """
+        url = urlsplit(request.url)
+        body = request.body or b""
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8") if hasattr(body, "encode") else b"".join(body)
+
+        path = unquote_to_bytes(url.path or "/").decode("latin-1")
+        if self.script_name and path.startswith(self.script_name):
+            path = path[len(self.script_name):]
+
+        environ = {
+            "REQUEST_METHOD": request.method.upper(),
+            "SCRIPT_NAME": self.script_name,
+            "PATH_INFO": path,
+            "QUERY_STRING": url.query,
+            "SERVER_NAME": url.hostname or "localhost",
+            "SERVER_PORT": str(url.port or (443 if url.scheme == "https" else 80)),
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "REMOTE_ADDR": "127.0.0.1",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": url.scheme,
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in request.headers.items():
+            key = name.upper().replace("-", "_")
+            if key == "CONTENT_TYPE":
+                environ[key] = value
+            elif key != "CONTENT_LENGTH":
+                environ["HTTP_" + key] = value
+        environ.setdefault("HTTP_HOST", url.netloc)
+
+        return environ
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        """
+        Call the application with the request
+        :param request: requests' PreparedRequest
+        :return: requests' response object
+        """
+        environ = self.get_environ(request)
+        response_start = []
+        written = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response_start:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start[:] = [status, headers]
+            return written.append
+
+        result = self.app(environ, start_response)
+        try:
+            body = b"".join(written) + b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+        status, headers = response_start
+        response = Response()
+        response.status_code = int(status.split(" ", 1)[0])
+        response.reason = status.split(" ", 1)[1] if " " in status else ""
+        response.headers = CaseInsensitiveDict()
+        for name, value in headers:
+            # Repeated headers are folded into one, as urllib3 does
+            response.headers[name] = response.headers[name] + ", " + value if name in response.headers else value
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
@@ -8,5 +8,7 @@ setup(name="pyrestcli",
       version="0.6.12",
       license="MIT",
       url="https://github.com/danicarrion/pyrestcli",
-      install_requires=['requests>=2.10.0', 'python-dateutil>=2.5.3', 'future>=0.15.2'],
+      install_requires=['requests>=2.10.0', 'python-dateutil>=2.5.3'],
+      python_requires='>=3.7',
+      extras_require={'async': ['httpx>=0.23.0']},
       packages=["pyrestcli"])
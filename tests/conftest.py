@@ -1,6 +1,84 @@
+import io
+import json
+
 import pytest
+import requests
 
 from pyrestcli.auth import BasicAuthClient
+from pyrestcli.fields import CharField, IntegerField
+from pyrestcli.paginators import PageNumberPaginator
+from pyrestcli.resources import Resource, Manager
+
+
+class StubServer(object):
+    """
+    Callable with the signature of requests' session.request, that returns the given responses in order and records the requests
+
+    Responses are given as status codes, as (status code, body, headers) tuples, or as exceptions to be raised instead
+    """
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, http_method, url, **requests_args):
+        self.requests.append((http_method, url, requests_args))
+        status_code = self.responses.pop(0)
+        if isinstance(status_code, Exception):
+            raise status_code
+        content, headers = b"", {}
+        if isinstance(status_code, tuple):
+            status_code, content, headers = status_code
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.raw = io.BytesIO(content)
+        response._content = content
+        response.headers.update(headers)
+        response.url = url
+        return response
+
+
+class Tag(Resource):
+    id = IntegerField()
+    name = CharField()
+
+    class Meta:
+        collection_endpoint = "tags/"
+        batch_endpoint = "tags/batch/"
+
+
+class TagManager(Manager):
+    resource_class = Tag
+    paginator_class = PageNumberPaginator
+
+
+class TagApp(object):
+    """
+    WSGI application with five tags, served for an hour. The collection comes in pages of two, found in the "data" attribute of every
+    page, and tags are updated through a batch endpoint
+    """
+    def __init__(self):
+        self.tags = dict((tag_id, {"id": tag_id, "name": name}) for tag_id, name in enumerate(["pizza", "pasta", "salad", "soup", "cake"], 1))
+        self.requests = []
+
+    def __call__(self, environ, start_response):
+        method, path, query = environ["REQUEST_METHOD"], environ["PATH_INFO"], environ["QUERY_STRING"]
+        self.requests.append((method, path, query))
+
+        if method == "PATCH" and path == "/tags/batch/":
+            body = json.loads(environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"])))
+            for tag_data in body:
+                self.tags[tag_data["id"]].update(tag_data)
+            data = [self.tags[tag_data["id"]] for tag_data in body]
+        elif path == "/tags/":
+            page = int(query.partition("page=")[2] or 1)
+            tags = [self.tags[tag_id] for tag_id in sorted(self.tags)]
+            data = {"count": len(tags), "data": tags[(page - 1) * 2:page * 2]}
+        else:
+            data = self.tags[int(path.strip("/").split("/")[-1])]
+
+        start_response("200 OK", [("Content-Type", "application/json"), ("Cache-Control", "max-age=3600")])
+        return [json.dumps(data).encode("utf-8")]
 
 
 @pytest.fixture(scope="session")
@@ -10,3 +88,33 @@ def basic_auth_client():
     :return: BasicAuthClient instance
     """
     return BasicAuthClient("admin", "admin", "http://localhost:8000")
+
+
+@pytest.fixture
+def stub_server():
+    """
+    Returns the StubServer class, to build stub servers with the responses each test needs
+    :return: StubServer class
+    """
+    return StubServer
+
+
+@pytest.fixture
+def tag_app():
+    """
+    Returns a fresh tag application, which records the requests it gets
+    :return: TagApp instance
+    """
+    return TagApp()
+
+
+@pytest.fixture
+def make_tag_manager(tag_app):
+    """
+    Returns a function that builds tag managers whose requests are served in-process by the tag application
+    :return: Function that takes options for the auth client, and returns a TagManager instance
+    """
+    def make_tag_manager(**client_options):
+        return TagManager(BasicAuthClient("admin", "admin", "http://testserver/", app=tag_app, **client_options))
+
+    return make_tag_manager
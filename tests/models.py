@@ -1,5 +1,5 @@
 from pyrestcli.fields import CharField, IntegerField, DateTimeField, ResourceField
-from pyrestcli.resources import Resource, Manager
+from pyrestcli.resources import Resource, Manager, AsyncManager
 from pyrestcli.paginators import NextWithUrlPaginator
 
 
@@ -41,3 +41,15 @@ class ChoiceManager(Manager):
     resource_class = Choice
     json_collection_attribute = "results"
     paginator_class = NextWithUrlPaginator
+
+
+class AsyncQuestionManager(AsyncManager):
+    resource_class = Question
+    json_collection_attribute = "results"
+    paginator_class = NextWithUrlPaginator
+
+
+class AsyncChoiceManager(AsyncManager):
+    resource_class = Choice
+    json_collection_attribute = "results"
+    paginator_class = NextWithUrlPaginator
@@ -1,9 +1,19 @@
+import asyncio
+import os
 import pytest
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from pyrestcli.auth import AsyncBasicAuthClient, BasicAuthClient
 from pyrestcli.exceptions import NotFoundException
+from pyrestcli.fields import CharField, DateTimeField, IntegerField
+from pyrestcli.paginators import PageNumberPaginator
+from pyrestcli.resources import Resource, prefetch
 
-from models import Question, QuestionManager, Choice, ChoiceManager
+from models import Question, QuestionManager, Choice, ChoiceManager, AsyncQuestionManager, AsyncChoiceManager, ChoiceField
 
 
 @pytest.fixture(scope="module")
@@ -26,6 +36,27 @@ def choice_manager(basic_auth_client):
     return ChoiceManager(basic_auth_client)
 
 
+@pytest.fixture
+def django_application(monkeypatch):
+    """
+    Returns the test server's WSGI application, with Django set up for the duration of the test only
+    :return: WSGI application
+    """
+    pytest.importorskip("django")
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+    from django.utils.functional import empty
+
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(os.path.abspath(__file__)), "restserver"))
+    monkeypatch.setenv("DJANGO_SETTINGS_MODULE", "restserver.settings")
+    try:
+        yield get_wsgi_application()
+    finally:
+        settings._wrapped = empty
+        for module_name in [module_name for module_name in sys.modules if module_name.split(".")[0] in ("restserver", "polls")]:
+            del sys.modules[module_name]
+
+
 def test_get_questions(question_manager):
     """
     Returns a list of questions
@@ -96,3 +127,347 @@ def test_create_and_delete_question(question_manager):
     new_question.delete()
     with pytest.raises(NotFoundException):
         question_manager.get(new_question.id)
+
+
+def test_iter_questions(question_manager):
+    """
+    Lazily iterates over the questions, page by page
+    :param question_manager: Fixture that provides a question manager to work with
+    """
+    questions = question_manager.iter_all()
+
+    assert isinstance(next(questions), Question)
+    assert len(list(questions)) == 1
+
+
+def test_async_get_questions():
+    """
+    Retrieves questions concurrently with an asynchronous auth client
+    """
+    pytest.importorskip("httpx")
+
+    async def get_questions():
+        async_auth_client = AsyncBasicAuthClient("admin", "admin", "http://localhost:8000")
+        question_manager = AsyncQuestionManager(async_auth_client)
+        try:
+            return await asyncio.gather(question_manager.all(), question_manager.get(1))
+        finally:
+            await async_auth_client.close()
+
+    questions, question = asyncio.run(get_questions())
+
+    assert len(questions) == 2
+    assert question.question_text == "Do you like pizza?"
+
+
+def test_prefetch_choices(basic_auth_client):
+    """
+    Returns the same list of choices when the next pages are prefetched
+    :param basic_auth_client: Fixture that provides a valid BasicAuthClient object
+    """
+    choice_manager = ChoiceManager(basic_auth_client)
+    choice_manager.paginator.prefetch = 2
+
+    choices = choice_manager.all()
+
+    assert [choice.id for choice in choices] == [choice.id for choice in ChoiceManager(basic_auth_client).all()]
+
+
+def test_parallel_choices(basic_auth_client):
+    """
+    Returns the same list of choices when pages are requested concurrently
+    :param basic_auth_client: Fixture that provides a valid BasicAuthClient object
+    """
+    choice_manager = ChoiceManager(basic_auth_client)
+    choice_manager.paginator = PageNumberPaginator(basic_auth_client.base_url)
+
+    choices = choice_manager.all()
+
+    assert [choice.id for choice in choices] == [choice.id for choice in ChoiceManager(basic_auth_client).all()]
+
+
+def test_get_many_questions(question_manager):
+    """
+    Retrieves several questions at once, reporting the ones that do not exist
+    :param question_manager: Fixture that provides a question manager to work with
+    """
+    questions, missing_ids = question_manager.get_many([1, 2, 1, 999])
+
+    assert sorted(questions.keys()) == [1, 2]
+    assert questions[1].question_text == "Do you like pizza?"
+    assert missing_ids == [999]
+
+
+def test_async_get_many_questions():
+    """
+    Retrieves several questions at once with an asynchronous auth client
+    """
+    pytest.importorskip("httpx")
+
+    async def get_many_questions():
+        async_auth_client = AsyncBasicAuthClient("admin", "admin", "http://localhost:8000")
+        try:
+            return await AsyncQuestionManager(async_auth_client).get_many([1, 2, 1, 999])
+        finally:
+            await async_auth_client.close()
+
+    questions, missing_ids = asyncio.run(get_many_questions())
+
+    assert sorted(questions.keys()) == [1, 2]
+    assert questions[1].question_text == "Do you like pizza?"
+    assert missing_ids == [999]
+
+
+def test_identity_map():
+    """
+    Shares one single question object among all the choices that point to it
+    """
+    auth_client = BasicAuthClient("admin", "admin", "http://localhost:8000", identity_map=True)
+
+    choices = ChoiceManager(auth_client).filter(question=1)
+    question = QuestionManager(auth_client).get(1)
+
+    assert choices[0].question is choices[1].question
+    assert question is choices[0].question
+    assert question.choices[0] is choices[0]
+
+
+def test_save_only_dirty_fields(question_manager):
+    """
+    Only changed fields are saved, and nothing is sent if nothing changed
+    :param question_manager: Fixture that provides a question manager to work with
+    """
+    question = question_manager.get(1)
+    assert question.get_dirty_fields() == set()
+    assert question.save() is None
+
+    question.question_text = "Do you like pepperoni?"
+    assert question.get_dirty_fields() == {"question_text"}
+    assert question.save().request.method == "PATCH"
+    assert question.get_dirty_fields() == set()
+    assert question_manager.get(1).question_text == "Do you like pepperoni?"
+
+    # Let's undo the change
+    question.question_text = "Do you like pizza?"
+    question.save()
+
+
+def test_lazy_fields(basic_auth_client):
+    """
+    Lazy resources convert their values the first time they are accessed
+    :param basic_auth_client: Fixture that provides a valid BasicAuthClient object
+    """
+    class LazyQuestion(Resource):
+        id = IntegerField()
+        question_text = CharField()
+        pub_date = DateTimeField()
+        choices = ChoiceField(many=True)
+
+        class Meta:
+            lazy = True
+
+    question = LazyQuestion.from_dict(basic_auth_client, {"id": 1, "question_text": "Do you like pizza?",
+                                                          "pub_date": "2016-09-11T14:57:00Z", "choices": [1, 2]})
+    assert isinstance(question._raw_values["pub_date"], str)
+
+    assert question.pub_date == datetime(2016, 9, 11, 14, 57, tzinfo=question.pub_date.tzinfo)
+    assert question.choices[1].id == 2
+    assert question._raw_values == {}
+    assert question.get_dirty_fields() == set()
+
+
+def test_prefetch_questions(basic_auth_client):
+    """
+    Populates the questions of many choices at once
+    :param basic_auth_client: Fixture that provides a valid BasicAuthClient object
+    """
+    choices = ChoiceManager(basic_auth_client).filter(prefetch=["question"])
+
+    assert len(choices) == 4
+    assert choices[0].question.question_text == "Do you like pizza?"
+    assert choices[3].question.question_text == "Do you like spaguetti?"
+    assert choices[0].question.get_dirty_fields() == set()
+
+    choices = ChoiceManager(basic_auth_client).all()
+    prefetch(choices, "question", managers={"question": QuestionManager(basic_auth_client)})
+
+    assert choices[2].question.pub_date is not None
+
+
+def test_async_prefetch_questions():
+    """
+    Populates the questions of many choices at once with an asynchronous auth client
+    """
+    pytest.importorskip("httpx")
+
+    async def get_choices():
+        async_auth_client = AsyncBasicAuthClient("admin", "admin", "http://localhost:8000")
+        try:
+            return await AsyncChoiceManager(async_auth_client).filter(prefetch=["question"])
+        finally:
+            await async_auth_client.close()
+
+    choices = asyncio.run(get_choices())
+
+    assert len(choices) == 4
+    assert choices[0].question.question_text == "Do you like pizza?"
+    assert choices[3].question.question_text == "Do you like spaguetti?"
+
+
+def test_stream_choices(basic_auth_client):
+    """
+    Builds choices while their pages are being downloaded
+    :param basic_auth_client: Fixture that provides a valid BasicAuthClient object
+    """
+    class StreamingChoiceManager(ChoiceManager):
+        stream_pages = True
+
+    choices = StreamingChoiceManager(basic_auth_client).all()
+
+    assert [choice.id for choice in choices] == [1, 2, 3, 4]
+    assert choices[2].question.id == 2
+
+
+def test_bulk_choices(basic_auth_client):
+    """
+    Creates, updates and deletes many choices at once, without stopping at errors
+    :param basic_auth_client: Fixture that provides a valid BasicAuthClient object
+    """
+    choice_manager = ChoiceManager(basic_auth_client)
+
+    results = choice_manager.bulk_create({"question": 1, "choice_text": "Maybe {i}".format(i=i), "votes": 0} for i in range(5))
+    assert all(result.ok for result in results)
+    choices = [result.resource for result in results]
+    assert len(set(choice.id for choice in choices)) == 5
+
+    for choice in choices:
+        choice.votes = 1
+    assert all(result.ok for result in choice_manager.bulk_update(choices))
+    assert choice_manager.get(choices[4].id).votes == 1
+
+    results = choice_manager.bulk_delete([choice.id for choice in choices] + [999])
+    assert [result.ok for result in results] == [True] * 5 + [False]
+    assert isinstance(results[5].exception, NotFoundException)
+    assert len(choice_manager.all()) == 4
+
+
+def test_async_bulk_choices():
+    """
+    Creates, updates and deletes many choices at once with an asynchronous auth client
+    """
+    pytest.importorskip("httpx")
+
+    async def bulk_choices():
+        async_auth_client = AsyncBasicAuthClient("admin", "admin", "http://localhost:8000")
+        choice_manager = AsyncChoiceManager(async_auth_client)
+        try:
+            results = await choice_manager.bulk_create({"question": 1, "choice_text": "Maybe {i}".format(i=i), "votes": 0}
+                                                       for i in range(5))
+            assert all(result.ok for result in results)
+            choices = [result.resource for result in results]
+            assert len(set(choice.id for choice in choices)) == 5
+
+            for choice in choices:
+                choice.votes = 1
+            assert all(result.ok for result in await choice_manager.bulk_update(choices))
+            assert (await choice_manager.get(choices[4].id)).votes == 1
+
+            results = await choice_manager.bulk_delete([choice.id for choice in choices] + [999])
+            assert [result.ok for result in results] == [True] * 5 + [False]
+            assert isinstance(results[5].exception, NotFoundException)
+            assert len(await choice_manager.all()) == 4
+        finally:
+            await async_auth_client.close()
+
+    asyncio.run(bulk_choices())
+
+
+def test_metrics():
+    """
+    Collects metrics per endpoint, and calls hooks on every request
+    """
+    auth_client = BasicAuthClient("admin", "admin", "http://localhost:8000", metrics=True)
+    sent_requests = []
+    auth_client.add_hook("before_send", lambda http_method, url, requests_args: sent_requests.append(url))
+
+    ChoiceManager(auth_client).all()
+    QuestionManager(auth_client).get_or_none(999)
+
+    metrics = auth_client.metrics.to_dict()
+    assert len(sent_requests) == 3
+    assert metrics["requests"]["GET /choices/"]["latency"]["count"] == 2
+    assert metrics["requests"]["GET /questions/{id}/"]["errors"] == {"NotFoundException": 1}
+    assert metrics["filters"]["/choices/"]["sum"] == 2
+    assert 'pyrestcli_responses_total{endpoint="/questions/{id}/",method="GET",status="404"} 1' in auth_client.metrics.to_prometheus()
+
+
+def test_wsgi_transport(django_application):
+    """
+    Calls the test server's WSGI application in the same process, with no sockets
+    :param django_application: Fixture that provides the test server's WSGI application
+    """
+    auth_client = BasicAuthClient("admin", "admin", "http://localhost:8000", app=django_application)
+    question_manager = QuestionManager(auth_client)
+
+    assert len(question_manager.all()) == 2
+    assert len(ChoiceManager(auth_client).all()) == 4
+    assert question_manager.get_or_none(999) is None
+    assert auth_client.warm_up() == 0
+
+
+def test_coalesce_requests():
+    """
+    Sends concurrent identical GET requests only once
+    """
+    auth_client = BasicAuthClient("admin", "admin", "http://localhost:8000", coalesce=True)
+    auth_client.add_hook("before_send", lambda http_method, url, requests_args: time.sleep(0.2))  # Keep the first request in flight
+    question_manager = QuestionManager(auth_client)
+    barrier = threading.Barrier(8)
+
+    def get_question(_):
+        barrier.wait()
+        return question_manager.get(1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        questions = list(executor.map(get_question, range(8)))
+
+    assert all(question.id == 1 and question.question_text == questions[0].question_text for question in questions)
+    assert len(set(id(question) for question in questions)) == 8
+    assert auth_client.coalescer.get_stats() == {"requests": 1, "coalesced": 7}
+
+
+def test_count_questions(question_manager):
+    """
+    Counts the questions with the count of the first page, or walking every page if the API gives no count
+    """
+    class UncountedQuestionManager(QuestionManager):
+        count_attribute = None
+
+    async def count_questions():
+        async_auth_client = AsyncBasicAuthClient("admin", "admin", "http://localhost:8000")
+        try:
+            return await AsyncQuestionManager(async_auth_client).count()
+        finally:
+            await async_auth_client.close()
+
+    assert question_manager.count() == 2
+    assert question_manager.exists()
+    assert UncountedQuestionManager(question_manager.client).count() == 2
+    assert UncountedQuestionManager(question_manager.client).exists()
+    assert asyncio.run(count_questions()) == 2
+
+
+def test_sparse_fields(question_manager):
+    """
+    Decodes only the fields asked for, and saves only the fields that were retrieved
+    """
+    questions = question_manager.filter(only=["question_text"])
+
+    assert len(questions) == 2
+    assert all(question.is_partial() and question.id is not None and question.pub_date is None for question in questions)
+    assert questions[0].get_save_request(force_create=True)[2]["json"] == {"id": 1, "question_text": "Do you like pizza?"}
+
+    question = question_manager.get(1, only=["question_text"])
+    question.refresh()
+    assert not question.is_partial()
+    assert question.pub_date is not None
@@ -0,0 +1,95 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests.adapters import HTTPAdapter
+
+from pyrestcli.auth import BasicAuthClient, NoAuthClient
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """
+    Handler that answers every request with an empty JSON object, keeping connections open, and records the connections it gets
+    """
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super(KeepAliveHandler, self).setup()
+        self.server.connections.append(self.client_address)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """
+    Local HTTP server, running in a thread
+    :return: Server, with the list of connections it got in its connections attribute
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    server.daemon_threads = True
+    server.connections = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_pool_options():
+    """
+    Pool options mount an adapter with the given pool sizes for both schemes, and the defaults of requests are kept otherwise
+    """
+    auth_client = BasicAuthClient("admin", "admin", "http://localhost:8000", pool_connections=3, pool_maxsize=20, pool_block=True)
+
+    for url in ("http://localhost:8000/", "https://example.com/"):
+        adapter = auth_client.session.get_adapter(url)
+        assert isinstance(adapter, HTTPAdapter)
+        assert (adapter._pool_connections, adapter._pool_maxsize, adapter._pool_block) == (3, 20, True)
+        assert adapter.poolmanager.connection_pool_kw["maxsize"] == 20
+
+    adapter = BasicAuthClient("admin", "admin", "http://localhost:8000", pool_maxsize=20).session.get_adapter("http://localhost:8000/")
+    assert (adapter._pool_connections, adapter._pool_maxsize, adapter._pool_block) == (10, 20, False)
+
+
+def test_warm_up(server):
+    """
+    Warming up opens the given number of connections, capped to pool_maxsize, and later requests reuse them
+    """
+    base_url = "http://127.0.0.1:{port}/".format(port=server.server_address[1])
+    auth_client = NoAuthClient(base_url, pool_maxsize=3)
+
+    try:
+        assert auth_client.warm_up(5) == 3
+        assert len(server.connections) == 3
+
+        for i in range(3):
+            auth_client.send("questions/", "get")
+        assert len(server.connections) == 3
+    finally:
+        auth_client.session.close()
+
+
+def test_in_process_warm_up():
+    """
+    There is nothing to warm up for APIs served in the same process
+    """
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return [b"{}"]
+
+    assert NoAuthClient("http://testserver/", app=app).warm_up(2) == 0
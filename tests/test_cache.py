@@ -0,0 +1,157 @@
+import time
+
+import pytest
+
+from pyrestcli.auth import AsyncBasicAuthClient
+from pyrestcli.cache import CacheEntry, FileCache, MemoryCache
+
+
+def test_batch_invalidation(tag_app, make_tag_manager):
+    """
+    Writing resources through the batch endpoint removes their stored responses from the cache
+    """
+    tag_manager = make_tag_manager(cache=MemoryCache())
+
+    tags = [tag_manager.get(1), tag_manager.get(2)]
+    assert tag_manager.get(1).name == "pizza"
+    assert len(tag_app.requests) == 2
+
+    for tag in tags:
+        tag.name = tag.name.upper()
+    assert all(result.ok for result in tag_manager.bulk_update(tags))
+
+    assert tag_manager.get(1).name == "PIZZA"
+    assert tag_manager.get(2).name == "PASTA"
+    assert len(tag_app.requests) == 5
+
+
+def test_fresh_responses(stub_server):
+    """
+    Fresh responses are served without contacting the server
+    """
+    cache = MemoryCache()
+    server = stub_server((200, b'{"id": 1}', {"Cache-Control": "max-age=60"}))
+
+    response = cache.send(server, "get", "http://testserver/tags/1/", params={"expand": 1})
+    assert response.from_cache is False
+    response = cache.send(server, "get", "http://testserver/tags/1/", params={"expand": 1})
+    assert response.from_cache is True
+    assert response.json() == {"id": 1}
+    assert len(server.requests) == 1
+
+
+def test_revalidation(stub_server):
+    """
+    Stale responses are revalidated with conditional requests, and served from the cache when the server answers 304
+    """
+    cache = MemoryCache()
+    server = stub_server((200, b'{"id": 1}', {"ETag": '"v1"', "Cache-Control": "no-cache"}),
+                         (304, b"", {"ETag": '"v1"', "Cache-Control": "no-cache"}))
+
+    cache.send(server, "get", "http://testserver/tags/1/")
+    response = cache.send(server, "get", "http://testserver/tags/1/")
+
+    assert server.requests[1][2]["headers"]["If-None-Match"] == '"v1"'
+    assert response.from_cache is True
+    assert response.content == b'{"id": 1}'
+
+
+def test_lru_eviction():
+    """
+    The least recently used entries are evicted when the stored bodies take more bytes than allowed
+    """
+    cache = MemoryCache(max_size=10)
+    for key in ("http://testserver/a/", "http://testserver/b/"):
+        cache.set(key, CacheEntry(key, b"1234", {}))
+    cache.get("http://testserver/a/")
+    cache.set("http://testserver/c/", CacheEntry("http://testserver/c/", b"1234", {}))
+
+    assert cache.get("http://testserver/b/") is None
+    assert cache.get("http://testserver/a/") is not None
+    assert cache.size == 8
+
+    cache.set("http://testserver/d/", CacheEntry("http://testserver/d/", b"12345678901", {}))
+    assert cache.get("http://testserver/d/") is None
+
+
+def test_write_invalidation(stub_server):
+    """
+    Writing a resource removes the stored responses for it, with any query string, and for its collection
+    """
+    cache = MemoryCache()
+    server = stub_server(*[(200, b'{"id": 1}', {"Cache-Control": "max-age=60"})] * 4)
+
+    cache.send(server, "get", "http://testserver/tags/1/")
+    cache.send(server, "get", "http://testserver/tags/1/", params={"expand": 1})
+    cache.send(server, "get", "http://testserver/tags/")
+    cache.send(server, "patch", "http://testserver/tags/1/", json={"name": "pizza"})
+
+    assert cache.entries == {}
+
+
+def test_file_cache(tmp_path, stub_server):
+    """
+    File caches keep responses across instances, overwriting entries in place
+    """
+    server = stub_server((200, b'{"id": 1}', {"ETag": '"v1"', "Cache-Control": "max-age=60"}),
+                         (200, b'{"id": 2}', {"Cache-Control": "max-age=60"}))
+
+    response = FileCache(str(tmp_path)).send(server, "get", "http://testserver/tags/1/")
+    assert response.from_cache is False
+    response = FileCache(str(tmp_path)).send(server, "get", "http://testserver/tags/1/")
+    assert response.from_cache is True
+    assert response.json() == {"id": 1}
+    assert response.headers["ETag"] == '"v1"'
+
+    cache = FileCache(str(tmp_path))
+    cache.set("http://testserver/tags/1/", CacheEntry("http://testserver/tags/1/", b'{"id": 3}', {"Cache-Control": "max-age=60"}))
+    assert cache.get("http://testserver/tags/1/").content == b'{"id": 3}'
+    assert len(list(tmp_path.rglob("*"))) == 2  # One directory for the URL, with one entry and no leftover temporary files
+    assert len(server.requests) == 1
+
+
+def test_file_cache_expiration(tmp_path, monkeypatch, stub_server):
+    """
+    Expired entries of file caches are requested again
+    """
+    cache = FileCache(str(tmp_path))
+    server = stub_server(*[(200, b'{"id": 1}', {"Cache-Control": "max-age=60"})] * 2)
+
+    cache.send(server, "get", "http://testserver/tags/1/")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    response = cache.send(server, "get", "http://testserver/tags/1/")
+
+    assert response.from_cache is False
+    assert len(server.requests) == 2
+
+
+def test_file_cache_invalidation(tmp_path, stub_server):
+    """
+    Writing a resource removes the entries of file caches for it, with any query string, and leaves others alone
+    """
+    cache = FileCache(str(tmp_path))
+    server = stub_server(*[(200, b'{"id": 1}', {"Cache-Control": "max-age=60"})] * 4)
+
+    cache.send(server, "get", "http://testserver/tags/1/")
+    cache.send(server, "get", "http://testserver/tags/1/", params={"expand": 1})
+    cache.send(server, "get", "http://testserver/tags/2/")
+    assert cache.get("http://testserver/tags/1/?expand=1") is not None
+    cache.send(server, "patch", "http://testserver/tags/1/", json={"name": "pizza"})
+
+    assert cache.get("http://testserver/tags/1/") is None
+    assert cache.get("http://testserver/tags/1/?expand=1") is None
+    assert cache.get("http://testserver/tags/2/") is not None
+
+    cache.clear()
+    assert cache.get("http://testserver/tags/2/") is None
+
+
+def test_async_cache():
+    """
+    Asynchronous clients refuse caches instead of ignoring them
+    """
+    pytest.importorskip("httpx")
+
+    with pytest.raises(ValueError):
+        AsyncBasicAuthClient("admin", "admin", "http://testserver/", cache=MemoryCache())
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+from dateutil.parser import parse
+
+from pyrestcli.fields import DateTimeField
+
+
+@pytest.mark.parametrize("value", [
+    "2016-09-11T14:57:00",
+    "2016-09-11T14:57:00.123456",
+    "2016-09-11T14:57:00+02:00",
+    "2016-09-11T14:57:00.5-05:30",
+    "2016-09-11",
+])
+def test_iso_datetimes(value, monkeypatch):
+    """
+    ISO-8601 strings are parsed as dateutil does, without it
+    """
+    monkeypatch.setattr("pyrestcli.fields.parse", None)
+    parsed_value = DateTimeField().to_python(None, value)
+    monkeypatch.undo()
+
+    assert parsed_value == parse(value)
+    assert parsed_value.utcoffset() == parse(value).utcoffset()
+
+
+def test_utc_suffix(monkeypatch):
+    """
+    A trailing Z means UTC, without dateutil
+    """
+    monkeypatch.setattr("pyrestcli.fields.parse", None)
+    parsed_value = DateTimeField().to_python(None, "2016-09-11T14:57:00Z")
+    monkeypatch.undo()
+
+    assert parsed_value == parse("2016-09-11T14:57:00Z")
+    assert parsed_value.utcoffset() == parse("2016-09-11T14:57:00Z").utcoffset()
+
+
+@pytest.mark.parametrize("value", ["Sep 11 2016 14:57", "11 September 2016, 2:57 PM UTC", "2016/09/11 14:57:00 +0200"])
+def test_dateutil_fallback(value):
+    """
+    Strings that are not ISO-8601 are parsed with dateutil
+    """
+    parsed_value = DateTimeField().to_python(None, value)
+
+    assert parsed_value == parse(value)
+    assert parsed_value.utcoffset() == parse(value).utcoffset()
+
+
+def test_datetime_format():
+    """
+    Strings are parsed with the given format, and anything else raises an error
+    """
+    field = DateTimeField(datetime_format="%d/%m/%Y %H:%M")
+
+    assert field.to_python(None, "11/09/2016 14:57") == datetime(2016, 9, 11, 14, 57)
+    with pytest.raises(ValueError):
+        field.to_python(None, "2016-09-11T14:57:00")
+
+
+def test_many():
+    """
+    Lists of strings and datetimes are converted item by item
+    """
+    value = DateTimeField(many=True).to_python(None, ["2016-09-11T14:57:00Z", datetime(2016, 9, 12)])
+
+    assert value == [parse("2016-09-11T14:57:00Z"), datetime(2016, 9, 12)]
+
+
+def test_cache_size():
+    """
+    Parsed strings are cached up to cache_size, and not at all with a size of 0
+    """
+    field = DateTimeField(cache_size=2)
+    for value in ("2016-09-11T14:57:00Z", "2016-09-12T14:57:00Z", "2016-09-11T14:57:00Z", "2016-09-13T14:57:00Z"):
+        field.to_python(None, value)
+
+    cache_info = field.parse_datetime.cache_info()
+    assert (cache_info.hits, cache_info.misses, cache_info.maxsize, cache_info.currsize) == (1, 3, 2, 2)
+    assert field.to_python(None, "2016-09-11T14:57:00Z") is field.to_python(None, "2016-09-11T14:57:00Z")
+
+    assert not hasattr(DateTimeField(cache_size=0).parse_datetime, "cache_info")
@@ -0,0 +1,25 @@
+import json
+import math
+
+import pytest
+
+from pyrestcli.jsoncodec import get_default_codec, get_fast_codec
+
+
+@pytest.mark.parametrize("codec", [get_default_codec(), get_fast_codec()])
+def test_non_string_keys(codec):
+    """
+    Dictionaries with keys other than strings are encoded as the standard library does
+    """
+    assert json.loads(codec.encode({1: "one", "two": [2.5]})) == {"1": "one", "two": [2.5]}
+    assert codec.decode(b'{"1": "one"}') == {"1": "one"}
+
+
+def test_default_codec():
+    """
+    The default codec decodes whatever the standard library does, such as big integers and NaN
+    """
+    data = get_default_codec().decode(b'{"big": 123456789012345678901234567890, "nan": NaN}')
+
+    assert data["big"] == 123456789012345678901234567890
+    assert math.isnan(data["nan"])
@@ -0,0 +1,32 @@
+import pytest
+
+
+def test_collection_attribute(make_tag_manager):
+    """
+    Count paginators take the collection attribute from their manager
+    """
+    assert [tag.id for tag in make_tag_manager().all()] == [1, 2, 3, 4, 5]
+
+
+def test_empty_first_page(make_tag_manager):
+    """
+    Count paginators fail, instead of returning the first page only, when they cannot find the items of the first page
+    """
+    tag_manager = make_tag_manager()
+    tag_manager.paginator.results_attribute = "results"
+
+    with pytest.raises(ValueError):
+        tag_manager.all()
+
+
+def test_count(tag_app, make_tag_manager):
+    """
+    Counting takes the count of the first page, or counts the items of every page, requesting each page only once
+    """
+    tag_manager = make_tag_manager()
+    assert tag_manager.count() == 5
+    assert len(tag_app.requests) == 1
+
+    tag_manager.count_attribute = None
+    assert tag_manager.count() == 5
+    assert [query for method, path, query in tag_app.requests[1:]] == ["", "page=2", "page=3"]
@@ -0,0 +1,70 @@
+import time
+
+from pyrestcli.ratelimit import FileTokenBucket, RateLimiter, TokenBucket
+
+
+def test_refill():
+    """
+    Buckets are refilled at rate tokens per second, up to burst tokens, and every request takes one token
+    """
+    bucket = TokenBucket(2, burst=5)
+
+    assert bucket.refill(0, 100.0, 101.0) == (1, 0)
+    assert bucket.refill(4, 100.0, 200.0) == (4, 0)
+    assert bucket.refill(0, 100.0, 100.25) == (0.5, 0.25)
+    assert bucket.refill(3, 100.0, 99.0) == (2, 0)  # Clocks going backwards do not take tokens out
+
+
+def test_take():
+    """
+    Requests beyond the burst have to wait for their token
+    """
+    bucket = TokenBucket(1, burst=2)
+
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert 0 < bucket.take() <= 1
+
+
+def test_clock_changes(monkeypatch):
+    """
+    Buckets are not refilled when the system clock is set forward
+    """
+    bucket = TokenBucket(1, burst=1)
+    assert bucket.take() == 0
+
+    wall_clock = time.time()
+    monkeypatch.setattr(time, "time", lambda: wall_clock + 3600)
+    assert bucket.take() > 0
+
+
+def test_rules():
+    """
+    Requests take their token from the bucket of the first rule they match, or from the default bucket
+    """
+    default_bucket, post_bucket, tags_bucket, api_bucket = TokenBucket(1), TokenBucket(2), TokenBucket(3), TokenBucket(4)
+    rate_limiter = RateLimiter(default_bucket)
+    rate_limiter.add_rule(post_bucket, method="POST", prefix="/api/tags/")
+    rate_limiter.add_rule(tags_bucket, prefix="/api/tags/")
+    rate_limiter.add_rule(api_bucket, prefix="http://testserver/api/")
+
+    assert rate_limiter.get_bucket("post", "http://testserver/api/tags/1/") is post_bucket
+    assert rate_limiter.get_bucket("get", "http://testserver/api/tags/1/?expand=1") is tags_bucket
+    assert rate_limiter.get_bucket("post", "http://testserver/api/people/") is api_bucket
+    assert rate_limiter.get_bucket("get", "http://otherserver/api/people/") is default_bucket
+    assert RateLimiter().get_bucket("get", "http://testserver/api/people/") is None
+
+
+def test_file_bucket(tmp_path):
+    """
+    File buckets with the same key share their tokens, and buckets with other keys do not
+    """
+    bucket = FileTokenBucket(0.001, burst=2, key="tags", directory=str(tmp_path))
+    same_bucket = FileTokenBucket(0.001, burst=2, key="tags", directory=str(tmp_path))
+    other_bucket = FileTokenBucket(0.001, burst=2, key="people", directory=str(tmp_path))
+
+    assert bucket.take() == 0
+    assert same_bucket.take() == 0
+    assert bucket.take() > 0
+    assert same_bucket.take() > 0
+    assert other_bucket.take() == 0
@@ -0,0 +1,176 @@
+import asyncio
+
+import pytest
+
+from pyrestcli.auth import NoAuthClient
+from pyrestcli.fields import CharField, DateTimeField, IntegerField, ResourceField
+from pyrestcli.resources import AsyncManager, Manager, Resource, prefetch
+
+
+class Person(Resource):
+    id = IntegerField()
+    name = CharField()
+    friend = ResourceField()
+
+
+class CompactPerson(Resource):
+    id = IntegerField()
+    name = CharField()
+
+    class Meta:
+        compact = True
+
+
+def test_plain_resource():
+    """
+    Plain resources can be instantiated, and resources that are not compact hold any attribute
+    """
+    auth_client = NoAuthClient("http://localhost:8000")
+    resource = Resource(auth_client)
+    person = Person(auth_client, note="Not a field")
+
+    assert resource.client is auth_client
+    assert person.note == "Not a field"
+
+
+def test_default_resource_field():
+    """
+    Resource fields with no resource class build plain resources
+    """
+    auth_client = NoAuthClient("http://localhost:8000")
+    person = Person.from_dict(auth_client, {"id": 1, "name": "John", "friend": 5})
+
+    assert type(person.friend) is Resource
+    assert person.friend.client is auth_client
+
+
+def test_compact_resources():
+    """
+    Compact resources keep their fields in slots, with no instance dict, while regular resources keep them in a dict
+    """
+    auth_client = NoAuthClient("http://localhost:8000")
+    person = Person.from_dict(auth_client, {"id": 1, "name": "John"})
+    compact_person = CompactPerson.from_dict(auth_client, {"id": 1, "name": "John"})
+
+    assert person.__dict__["name"] == "John"
+    assert (compact_person.id, compact_person.name, compact_person.client) == (1, "John", auth_client)
+    assert not hasattr(compact_person, "__dict__")
+
+    compact_person.name = "Johnny"
+    assert compact_person.get_dirty_fields() == {"name"}
+
+    with pytest.raises(AttributeError):
+        compact_person.note = "Not a field"
+
+
+def test_compact_identity_map():
+    """
+    Compact resources are only kept in identity maps if they can be weakly referenced
+    """
+    class WeakCompactPerson(CompactPerson):
+        class Meta:
+            weakref = True
+
+    auth_client = NoAuthClient("http://localhost:8000", identity_map=True)
+
+    assert WeakCompactPerson.from_dict(auth_client, {"id": 1}) is WeakCompactPerson.from_dict(auth_client, {"id": 1})
+    assert CompactPerson.from_dict(auth_client, {"id": 1}) is not CompactPerson.from_dict(auth_client, {"id": 1})
+
+
+class Event(Resource):
+    id = IntegerField()
+    date = DateTimeField()
+
+
+def test_decode_errors():
+    """
+    Malformed data raises errors instead of skipping the resource
+    """
+    auth_client = NoAuthClient("http://localhost:8000")
+
+    with pytest.raises(ValueError):
+        list(Event.from_dicts(auth_client, [{"id": 1, "date": "2016-09-11T14:57:00Z"}, {"id": 2, "date": "not a date"}]))
+
+
+def test_identity_map_keeps_changes():
+    """
+    Retrieving a resource shared through an identity map again does not overwrite the changes that have not been saved yet
+    """
+    auth_client = NoAuthClient("http://localhost:8000", identity_map=True)
+    person = Person.from_dict(auth_client, {"id": 1, "name": "John", "friend": 2})
+    friend = person.friend
+    person.name = "Johnny"
+
+    assert Person.from_dict(auth_client, {"id": 1, "name": "John", "friend": 3}) is person
+    assert person.name == "Johnny"
+    assert person.friend is not friend
+    assert person.get_dirty_fields() == {"name"}
+    assert person.get_save_request()[2]["json"] == {"name": "Johnny"}
+
+
+def test_async_bulk_streaming():
+    """
+    Asynchronous bulk operations consume their input as they go, with a bounded number of batches in flight
+    """
+    class PersonManager(AsyncManager):
+        resource_class = Person
+        concurrency = 2
+
+    in_flight = []
+    max_in_flight = []
+    pulled = []
+    pulled_at_start = {}
+
+    async def operation(batch):
+        in_flight.append(batch)
+        max_in_flight.append(len(in_flight))
+        pulled_at_start[batch[0].id] = len(pulled)
+        await asyncio.sleep(0.01)
+        in_flight.remove(batch)
+        if batch[0].id == 3:
+            raise ValueError("Wrong person")
+
+    def people():
+        for person_id in range(1, 7):
+            pulled.append(person_id)
+            yield Person(None, id=person_id)
+
+    results = asyncio.run(PersonManager(NoAuthClient("http://localhost:8000")).run_bulk(operation, people(), batch_size=2))
+
+    assert [result.resource.id for result in results] == [1, 2, 3, 4, 5, 6]
+    assert [result.ok for result in results] == [True, True, False, False, True, True]
+    assert max(max_in_flight) == 2
+    assert pulled_at_start == {1: 4, 3: 4, 5: 6}  # Batches are pulled from the input only when there is room for them
+
+
+def test_related_managers():
+    """
+    Nested resources are retrieved through the manager declared for their resource class, not one configured like the caller
+    """
+    class Pet(Resource):
+        id = IntegerField()
+
+    class Owner(Resource):
+        id = IntegerField()
+
+    class PetManager(Manager):
+        resource_class = Pet
+        json_collection_attribute = None
+
+    class OwnerManager(Manager):
+        resource_class = Owner
+        json_collection_attribute = "results"
+
+    class AsyncOwnerManager(AsyncManager):
+        resource_class = Owner
+
+    auth_client = NoAuthClient("http://localhost:8000")
+
+    assert type(PetManager(auth_client).get_related_manager(Owner)) is OwnerManager
+    assert type(AsyncManager(auth_client).get_related_manager(Owner)) is AsyncOwnerManager
+    with pytest.raises(ValueError):
+        OwnerManager(auth_client).get_related_manager(Event)
+    person = Person(auth_client, id=1)
+    person.friend = Event(auth_client, id=2)
+    with pytest.raises(ValueError):
+        prefetch([person], "friend")
@@ -0,0 +1,99 @@
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from pyrestcli.retry import RetryPolicy
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """
+    Record the delays between attempts instead of waiting
+    """
+    delays = []
+    monkeypatch.setattr(time, "sleep", delays.append)
+    return delays
+
+
+def test_retry_after_seconds():
+    """
+    Retry-After can be given in seconds
+    """
+    response = requests.Response()
+    response.headers["Retry-After"] = "7"
+
+    assert RetryPolicy().get_delay(0, response) == 7
+
+
+def test_retry_after_date():
+    """
+    Retry-After can be given as an HTTP date
+    """
+    response = requests.Response()
+    response.headers["Retry-After"] = formatdate(time.time() + 30, usegmt=True)
+
+    assert 28 <= RetryPolicy().get_delay(0, response) <= 30
+
+
+def test_max_backoff():
+    """
+    Delays, even the ones asked for by the server, never exceed max_backoff
+    """
+    response = requests.Response()
+    response.headers["Retry-After"] = "3600"
+    retry_policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+
+    assert retry_policy.get_delay(0, response) == 5
+    assert retry_policy.get_delay(2) == 4
+    assert retry_policy.get_delay(3) == 5
+
+
+def test_post_not_retried(delays, stub_server):
+    """
+    post requests are only retried if retry_post is True
+    """
+    server = stub_server(503, 200)
+    assert RetryPolicy().send(server, "post", "http://testserver/tags/").status_code == 503
+    assert len(server.requests) == 1
+
+    server = stub_server(503, 200)
+    assert RetryPolicy(retry_post=True).send(server, "post", "http://testserver/tags/").status_code == 200
+    assert len(server.requests) == 2
+
+
+def test_patch_retried(delays, stub_server):
+    """
+    patch requests, which resources use to save changes, are retried by default
+    """
+    server = stub_server(503, 200)
+
+    assert RetryPolicy().send(server, "patch", "http://testserver/tags/1/").status_code == 200
+    assert len(server.requests) == 2
+
+
+def test_max_retries(delays, stub_server):
+    """
+    Requests are sent max_retries + 1 times at most, and the last response or error is returned
+    """
+    server = stub_server(*[503] * 5)
+    assert RetryPolicy(max_retries=2).send(server, "get", "http://testserver/tags/").status_code == 503
+    assert len(server.requests) == 3
+
+    server = stub_server(*[requests.ConnectionError()] * 5)
+    with pytest.raises(requests.ConnectionError):
+        RetryPolicy(max_retries=2).send(server, "get", "http://testserver/tags/")
+    assert len(server.requests) == 3
+
+
+def test_stats(delays, stub_server):
+    """
+    Retries and the time spent waiting between attempts are counted
+    """
+    retry_policy = RetryPolicy(backoff_factor=1, jitter=False)
+    response = retry_policy.send(stub_server(500, 429, 200), "get", "http://testserver/tags/")
+
+    assert response.status_code == 200
+    assert delays == [1, 2]
+    assert retry_policy.get_stats() == {"retries": 2, "backoff_time": 3}
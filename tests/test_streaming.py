@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from pyrestcli.streaming import StreamingDocument
+
+
+DATA = {
+    "count": 12345,
+    "results": [
+        {"id": 1, "text": "He said \"[not an array]\"", "tags": ["a", "b]"], "score": 1.5e3},
+        {"id": 2, "text": "{\"not\": \"an object\"} \\", "author": {"name": "José", "friends": [{"id": 3}, {"id": 4, "null": None}]}},
+        {"id": 3, "text": "", "nested": [[1, [2, []]], {}], "ok": True},
+    ],
+    "next": "http://testserver/questions/?page=2",
+}
+DOCUMENT = json.dumps(DATA, ensure_ascii=False).encode("utf-8")
+
+
+def get_chunks(document, chunk_size):
+    """
+    Split a document in chunks
+    :param document: Document, as bytes
+    :param chunk_size: Size of the chunks, in bytes
+    :return: List of chunks
+    """
+    return [document[start:start + chunk_size] for start in range(0, len(document), chunk_size)]
+
+
+class Closer(object):
+    """
+    Callable that counts how many times it has been called
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+
+
+@pytest.mark.parametrize("chunk_size", range(1, len(DOCUMENT) + 1))
+def test_chunks(chunk_size):
+    """
+    Members and items are decoded as the standard library does, no matter how the document is split
+    """
+    closer = Closer()
+    document = StreamingDocument(get_chunks(DOCUMENT, chunk_size), "results", closer)
+
+    assert document["count"] == DATA["count"]
+    assert list(document["results"]) == DATA["results"]
+    assert document["next"] == DATA["next"]
+    assert "previous" not in document
+    assert closer.calls == 1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, len(DOCUMENT)])
+def test_member_after_collection(chunk_size):
+    """
+    Members after the collection can be read first, and the items before them are kept for later
+    """
+    document = StreamingDocument(get_chunks(DOCUMENT, chunk_size), "results")
+
+    assert document["next"] == DATA["next"]
+    items = document["results"]
+    assert len(items) == len(DATA["results"])
+    assert list(items) == DATA["results"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+def test_decode_value(chunk_size):
+    """
+    Values are decoded across chunks, including numbers and literals that end at a chunk boundary
+    """
+    document = StreamingDocument(get_chunks(b'  12345 "say \\"hi\\" [x]" {"a": [1, {"b": null}]} true', chunk_size), "results")
+
+    assert document.decode_value() == 12345
+    assert document.decode_value() == "say \"hi\" [x]"
+    assert document.decode_value() == {"a": [1, {"b": None}]}
+    assert document.decode_value() is True
+
+
+def test_read():
+    """
+    Reading drops the part of the buffer that has been parsed, and multibyte characters can be split across chunks
+    """
+    document = StreamingDocument(get_chunks('"é" "ñ"'.encode("utf-8"), 1), "results")
+
+    assert document.decode_value() == "é"
+    assert document.decode_value() == "ñ"
+    assert "é" not in document.buffer
+    assert document.read() is False
+
+
+def test_abandoned_collection():
+    """
+    Documents are closed once, when their collection is abandoned before the end
+    """
+    closer = Closer()
+    document = StreamingDocument(get_chunks(DOCUMENT, 5), "results", closer)
+
+    items = iter(document["results"])
+    assert next(items) == DATA["results"][0]
+    assert closer.calls == 0
+    items.close()
+    assert closer.calls == 1
+    document.close()
+    assert closer.calls == 1
+
+
+def test_malformed_document():
+    """
+    Malformed documents raise errors
+    """
+    with pytest.raises(ValueError):
+        StreamingDocument(get_chunks(b'{"results": [1, 2}', 2), "results")["next"]